@@ -13,10 +13,15 @@ class Agent(BaseSprite):
         self.last_action = None
         self.id = None
         self.active = True
+        # map character of the agent when it differs from the kind of its class (set by Game)
+        self.char = None
 
     def get_id(self):
         return self.id
 
+    def map_char(self):
+        return self.char if self.char is not None else self.kind()
+
     def is_active(self):
         return self.active
 
@@ -25,15 +30,18 @@ class Agent(BaseSprite):
 
     def copy(self):
         agent_copy = copy.copy(self)
-        agent_copy.rect = self.image.get_rect()
+        agent_copy.rect = self.image.get_rect() if self.image else None
         agent_copy.place_to(self.position())
         return agent_copy
 
-    def move_towards(self, position):
+    def move_towards(self, position, step=1):
         row = position[0] - self.row
         col = position[1] - self.col
-        self.rect.x += col
-        self.rect.y += row
+        # never step over the destination tile
+        step = min(step, max(abs(position[1] * config.TILE_SIZE - self.rect.x),
+                             abs(position[0] * config.TILE_SIZE - self.rect.y)))
+        self.rect.x += col * step
+        self.rect.y += row * step
 
     def is_in_tile(self):
         return not self.rect.x % config.TILE_SIZE and not self.rect.y % config.TILE_SIZE
@@ -0,0 +1,64 @@
+import glob
+import hashlib
+import math
+import os
+import pygame
+
+import config
+
+
+class Atlas:
+    atlases = dict()
+
+    def __init__(self, tile_size):
+        self.tile_size = tile_size
+        self.names = sorted(name for name in os.listdir(config.IMG_FOLDER) if name.endswith('.png'))
+        self.slots = {name: slot for slot, name in enumerate(self.names)}
+        self.columns = max(math.ceil(math.sqrt(len(self.names))), 1)
+        self.surface = self.load()
+        self.images = dict()
+
+    @staticmethod
+    def get(tile_size=None):
+        tile_size = tile_size if tile_size else config.TILE_SIZE
+        if tile_size not in Atlas.atlases:
+            Atlas.atlases[tile_size] = Atlas(tile_size)
+        return Atlas.atlases[tile_size]
+
+    def digest(self):
+        # the cached atlas is rebuilt whenever an image is added, removed or changed
+        digest = hashlib.sha1()
+        for name in self.names:
+            stat = os.stat(os.path.join(config.IMG_FOLDER, name))
+            digest.update(f'{name}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+        return digest.hexdigest()[:16]
+
+    def slot_rect(self, slot):
+        row, col = divmod(slot, self.columns)
+        return pygame.Rect(col * self.tile_size, row * self.tile_size, self.tile_size, self.tile_size)
+
+    def load(self):
+        path = os.path.join(config.ATLAS_FOLDER, f'atlas_{self.tile_size}_{self.digest()}.png')
+        if os.path.exists(path):
+            return pygame.image.load(path).convert()
+        rows = math.ceil(len(self.names) / self.columns)
+        surface = pygame.Surface((self.columns * self.tile_size, max(rows, 1) * self.tile_size)).convert()
+        for slot, name in enumerate(self.names):
+            image = pygame.image.load(os.path.join(config.IMG_FOLDER, name)).convert()
+            surface.blit(pygame.transform.scale(image, (self.tile_size, self.tile_size)), self.slot_rect(slot))
+        try:
+            os.makedirs(config.ATLAS_FOLDER, exist_ok=True)
+            for stale in glob.glob(os.path.join(config.ATLAS_FOLDER, f'atlas_{self.tile_size}_*.png')):
+                os.remove(stale)
+            pygame.image.save(surface, f'{path}.tmp.png')
+            os.replace(f'{path}.tmp.png', path)
+        except OSError as e:
+            print(f'WARN: Sprite atlas could not be cached: {e}')
+        return surface
+
+    def image(self, file_name):
+        if file_name not in self.images:
+            if file_name not in self.slots:
+                raise Exception(f'ERR: {file_name} is not in the sprite atlas!')
+            self.images[file_name] = self.surface.subsurface(self.slot_rect(self.slots[file_name]))
+        return self.images[file_name]
@@ -0,0 +1,108 @@
+import argparse
+import glob
+import json
+import os
+import timeit
+import tracemalloc
+
+import config
+import mapfile
+import mapgen
+
+from states import GameState
+
+# timeit repeats of a primitive, every one runs at least 0.2s
+REPEAT = 3
+# calls kept alive while tracemalloc counts what they allocate
+ALLOC_CALLS = 100
+
+
+def primitives(state):
+    # name: call of a GameState primitive on the state (the student agent moves)
+    agent = state.agents[0]
+    actions = state.compute_legal_actions(0)
+    action = actions[0] if actions else None
+    row, col = agent.position()
+    calls = {
+        'GameState.copy': state.copy,
+        'get_legal_actions': lambda: state.get_legal_actions(0),
+        'compute_legal_actions': lambda: state.compute_legal_actions(0),
+        'is_position_legal': lambda: state.is_position_legal((row + 1, col + 1), agent),
+        'adjust_win_loss': state.adjust_win_loss,
+        'AgentState.copy': agent.copy
+    }
+    if action is not None:
+        calls['apply_action'] = lambda: state.apply_action(0, action)
+    try:
+        # the game agents are sprites, headless ones (no image) need pygame but no display
+        from agents import Agent
+        sprite = Agent(agent.position(), None)
+        calls['Agent.copy'] = sprite.copy
+    except ImportError:
+        pass
+    return calls
+
+
+def measure(call):
+    # (nanoseconds, allocated blocks, allocated bytes) per call, the results of the calls are kept alive so what
+    # they return is counted
+    timer = timeit.Timer(call)
+    number, _ = timer.autorange()
+    seconds = min(timer.repeat(REPEAT, number)) / number
+    results = [None] * ALLOC_CALLS
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for k in range(ALLOC_CALLS):
+        results[k] = call()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    blocks = sum(stat.count_diff for stat in stats) / ALLOC_CALLS
+    size = sum(stat.size_diff for stat in stats) / ALLOC_CALLS
+    return {'ns': seconds * 1e9, 'blocks': blocks, 'bytes': size}
+
+
+def maps(map_names, sizes, seed):
+    # (name, char_map) of the map files and of generated large maps
+    for map_name in map_names:
+        yield os.path.basename(map_name), mapfile.load(map_name)
+    for size in sizes:
+        yield f'generated{size}', mapgen.generate(size, size, agents=8, bots='1234', seed=seed)
+
+
+def change(new, old):
+    if not old:
+        return ''
+    return f' {100 * (new - old) / old:+6.1f}%'
+
+
+if __name__ == '__main__':
+    # headless: only the states module and the map files are loaded
+    parser = argparse.ArgumentParser(description='Benchmarks the GameState primitives of PyStolovina.')
+    parser.add_argument('maps', nargs='*', help='map files (default: all in maps/)')
+    parser.add_argument('--sizes', type=int, nargs='*', default=[64, 256], help='generated square map sizes')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--results', default=os.path.join(config.CACHE_FOLDER, 'bench.json'),
+                        help='results of the previous run to compare with, replaced by this run')
+    parser.add_argument('--no-save', action='store_true', help='only compare with the previous results')
+    a = parser.parse_args()
+    previous = {}
+    if os.path.exists(a.results):
+        with open(a.results) as f:
+            previous = json.load(f)
+    map_names = a.maps or sorted(glob.glob(os.path.join(config.MAP_FOLDER, '*')))
+    results = {}
+    for name, char_map in maps(map_names, a.sizes, a.seed):
+        state = GameState.from_char_map(char_map)
+        print(f'{name} ({len(char_map)}x{len(char_map[0])}, {len(state.agents)} agents):')
+        results[name] = {}
+        for primitive, call in primitives(state).items():
+            result = results[name][primitive] = measure(call)
+            old = previous.get(name, {}).get(primitive, {})
+            print(f'  {primitive:22} {result["ns"]:12.0f} ns{change(result["ns"], old.get("ns"))}  '
+                  f'{result["blocks"]:7.1f} blocks{change(result["blocks"], old.get("blocks"))}  '
+                  f'{result["bytes"]:10.0f} B{change(result["bytes"], old.get("bytes"))}')
+    if not a.no_save:
+        os.makedirs(os.path.dirname(a.results) or '.', exist_ok=True)
+        with open(a.results, 'w') as f:
+            json.dump(results, f, indent=1)
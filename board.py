@@ -0,0 +1,111 @@
+from actions import Action
+from mapfile import ROAD
+
+ACTIONS = list(Action.actions.keys())
+# maps map characters to 1 for free cells and 0 for holes and agents
+FREE = bytes(int(c == ord(ROAD)) for c in range(256))
+
+WIN = 1
+LOSS = -1
+
+
+class Board:
+    # Headless, flat copy of a game position. Cells are stored row by row with a blocked border around the map,
+    # so the neighbours of a cell are always at fixed offsets and moves are applied in place.
+
+    def __init__(self, char_map, positions, active=None):
+        # char_map rows can be lists of characters or strings
+        self.rows = len(char_map)
+        self.cols = len(char_map[0])
+        self.width = self.cols + 2
+        self.free = bytearray(self.width * (self.rows + 2))
+        for i, row in enumerate(char_map):
+            start = (i + 1) * self.width + 1
+            row = row if isinstance(row, str) else ''.join(row)
+            self.free[start:start + self.cols] = row.encode('latin-1').translate(FREE)
+        self.offsets = [row * self.width + col for row, col in Action.actions.values()]
+        self.positions = [self.index(position) for position in positions]
+        self.active = list(active) if active is not None else [True] * len(positions)
+
+    @staticmethod
+    def from_state(state):
+        return Board(state.char_map, [agent.position() for agent in state.agents],
+                     [agent.is_active() for agent in state.agents])
+
+    def copy(self):
+        board = Board.__new__(Board)
+        board.rows = self.rows
+        board.cols = self.cols
+        board.width = self.width
+        board.free = bytearray(self.free)
+        board.offsets = self.offsets
+        board.positions = list(self.positions)
+        board.active = list(self.active)
+        return board
+
+    def index(self, position):
+        return (position[0] + 1) * self.width + position[1] + 1
+
+    def position(self, index):
+        row, col = divmod(index, self.width)
+        return row - 1, col - 1
+
+    def is_free(self, row, col):
+        return 0 <= row < self.rows and 0 <= col < self.cols and self.free[self.index((row, col))] == 1
+
+    def moves(self, agent_id):
+        # indices of the legal actions (in ACTIONS order) of an agent
+        if not self.active[agent_id]:
+            return []
+        free = self.free
+        index = self.positions[agent_id]
+        return [k for k, offset in enumerate(self.offsets) if free[index + offset]]
+
+    def has_moves(self, agent_id):
+        if not self.active[agent_id]:
+            return False
+        free = self.free
+        index = self.positions[agent_id]
+        for offset in self.offsets:
+            if free[index + offset]:
+                return True
+        return False
+
+    def mobility(self, agent_id):
+        if not self.active[agent_id]:
+            return 0
+        free = self.free
+        index = self.positions[agent_id]
+        return sum(free[index + offset] for offset in self.offsets)
+
+    def move(self, agent_id, action_index):
+        # the agent leaves a hole behind, so only the target cell changes
+        origin = self.positions[agent_id]
+        target = origin + self.offsets[action_index]
+        self.free[target] = 0
+        self.positions[agent_id] = target
+        return origin
+
+    def undo(self, agent_id, origin):
+        self.free[self.positions[agent_id]] = 1
+        self.positions[agent_id] = origin
+
+    def deactivate_stuck(self):
+        for agent_id in range(len(self.positions)):
+            if self.active[agent_id] and not self.has_moves(agent_id):
+                self.active[agent_id] = False
+
+    def outcome(self, last_agent_played_id, me=0):
+        # the result for agent me (0 by default), the same way GameState.adjust_win_loss decides it for agent 0
+        mine = self.has_moves(me)
+        others = any(self.has_moves(agent_id) for agent_id in range(len(self.positions)) if agent_id != me)
+        if mine and not others:
+            return WIN
+        if not mine and others:
+            return LOSS
+        if not mine and not others and last_agent_played_id is not None:
+            return WIN if last_agent_played_id == me else LOSS
+        return 0
+
+    def is_over(self, last_agent_played_id):
+        return self.outcome(last_agent_played_id) != 0 or not any(self.active)
@@ -1,20 +1,23 @@
-import random
-
 from agents import Agent
+from mapfile import BOT_NAMES
+from policies import Chase, Wander
 from students import MinimaxABAgent, MaxNAgent
 
 
 class BotAgent(Agent):
-    agent_names = {'1': 'Aki', '2': 'Jocke', '3': 'Draza', '4': 'Bole'}
-    ID = 0
+    # map characters of the built in bots, maps name other agents in their legend (see mapfile.parse_legend)
+    agent_names = BOT_NAMES
+    # bots with a position-only policy do not search
+    policy = None
 
     def __init__(self, position, file_name):
+        # the game gives the id
         super(BotAgent, self).__init__(position, file_name)
-        BotAgent.ID += 1
-        self.id = BotAgent.ID
 
 
 class Aki(BotAgent):
+    policy = Chase(0)
+
     def __init__(self, position, file_name):
         super().__init__(position, file_name)
 
@@ -23,17 +26,12 @@ class Aki(BotAgent):
         return '1'
 
     def get_next_action(self, state, max_levels):
-        actions = self.get_legal_actions(state)
-        states_list = [state.apply_action(self.id, act) for act in actions]
-        coll = list(zip(actions, states_list))
-        if len(coll):
-            coll = sorted(coll, key=lambda st: sum(tuple(map(lambda i, j: abs(i - j),
-                          st[1].agents[0].position(), st[1].agents[self.id].position()))))
-            return coll[0][0]
-        return None
+        return self.policy.choose(self.id, [agent.position() for agent in state.agents], state)
 
 
 class Jocke(BotAgent):
+    policy = Wander()
+
     def __init__(self, position, file_name):
         super().__init__(position, file_name)
 
@@ -42,31 +40,19 @@ class Jocke(BotAgent):
         return '2'
 
     def get_next_action(self, state, max_levels):
-        actions = self.get_legal_actions(state)
-        return actions[random.randint(0, len(actions) - 1)]
+        return self.policy.choose(self.id, [agent.position() for agent in state.agents], state)
 
 
-class Draza(BotAgent, MinimaxABAgent):
-    def __init__(self, position, file_name):
-        MinimaxABAgent.__init__(self, position, file_name)
-        BotAgent.__init__(self, position, file_name)
+# the searching bots are configurations of the student search agents
+
 
+class Draza(BotAgent, MinimaxABAgent):
     @staticmethod
     def kind():
         return '3'
 
-    def get_next_action(self, state, max_levels):
-        return MinimaxABAgent.get_next_action(self, state, max_levels)
-
 
 class Bole(BotAgent, MaxNAgent):
-    def __init__(self, position, file_name):
-        MaxNAgent.__init__(self, position, file_name)
-        BotAgent.__init__(self, position, file_name)
-
     @staticmethod
     def kind():
         return '4'
-
-    def get_next_action(self, state, max_levels):
-        return MaxNAgent.get_next_action(self, state, max_levels)
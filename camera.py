@@ -0,0 +1,110 @@
+import math
+import pygame
+
+import config
+
+from tiles import Hole
+
+
+class Camera:
+    def __init__(self, rows, cols, width, height):
+        self.rows = rows
+        self.cols = cols
+        self.width = width
+        self.height = height
+        self.x = 0
+        self.y = 0
+        self.clamp()
+
+    def rect(self):
+        # the visible part of the map in map pixels
+        return pygame.Rect(self.x, self.y, self.width, self.height)
+
+    def view(self):
+        ts = config.TILE_SIZE
+        row_from = max(self.y // ts, 0)
+        col_from = max(self.x // ts, 0)
+        row_to = min((self.y + self.height - 1) // ts + 1, self.rows)
+        col_to = min((self.x + self.width - 1) // ts + 1, self.cols)
+        return row_from, row_to, col_from, col_to
+
+    def covers_map(self):
+        return self.cols * config.TILE_SIZE <= self.width and self.rows * config.TILE_SIZE <= self.height
+
+    def to_screen(self, rect):
+        return rect.move(-self.x, -self.y)
+
+    def center(self):
+        return (self.y + self.height / 2) / config.TILE_SIZE, (self.x + self.width / 2) / config.TILE_SIZE
+
+    def center_on(self, point):
+        self.x = int(point[1] * config.TILE_SIZE - self.width / 2)
+        self.y = int(point[0] * config.TILE_SIZE - self.height / 2)
+        self.clamp()
+
+    def scroll(self, rows, cols):
+        self.x += cols * config.TILE_SIZE
+        self.y += rows * config.TILE_SIZE
+        self.clamp()
+
+    def clamp(self):
+        # a map smaller than the window is centered in it
+        map_width = self.cols * config.TILE_SIZE
+        map_height = self.rows * config.TILE_SIZE
+        if map_width <= self.width:
+            self.x = (map_width - self.width) // 2
+        else:
+            self.x = min(max(self.x, 0), map_width - self.width)
+        if map_height <= self.height:
+            self.y = (map_height - self.height) // 2
+        else:
+            self.y = min(max(self.y, 0), map_height - self.height)
+
+
+class Minimap:
+    def __init__(self, char_map):
+        self.rows = len(char_map)
+        self.cols = len(char_map[0])
+        # every minimap pixel is a block x block square of map cells
+        self.block = max(math.ceil(max(self.rows, self.cols) / config.MINIMAP_SIZE), 1)
+        self.width = math.ceil(self.cols / self.block)
+        self.height = math.ceil(self.rows / self.block)
+        self.scale = max(config.MINIMAP_SIZE // max(self.width, self.height), 1)
+        self.cells = [0] * (self.width * self.height)
+        self.roads = [0] * (self.width * self.height)
+        for i, row in enumerate(char_map):
+            offset = (i // self.block) * self.width
+            for k, j in enumerate(range(0, self.cols, self.block)):
+                cells = row[j:j + self.block]
+                self.cells[offset + k] += len(cells)
+                self.roads[offset + k] += len(cells) - cells.count(Hole.kind())
+        self.pixels = bytearray(3 * self.width * self.height)
+        for k in range(len(self.cells)):
+            self.paint(k)
+        # the surface shares its pixels with the bytearray
+        self.surface = pygame.image.frombuffer(self.pixels, (self.width, self.height), 'RGB')
+
+    def paint(self, k):
+        share = self.roads[k] / self.cells[k]
+        self.pixels[3 * k:3 * k + 3] = bytes(int(c * share) for c in config.GREY)
+
+    def set_hole(self, position):
+        k = (position[0] // self.block) * self.width + position[1] // self.block
+        self.roads[k] -= 1
+        self.paint(k)
+
+    def draw(self, screen, camera, agents):
+        image = pygame.transform.scale(self.surface, (self.width * self.scale, self.height * self.scale))
+        left = camera.width - image.get_width() - config.MINIMAP_MARGIN
+        top = config.MINIMAP_MARGIN
+        screen.blit(image, (left, top))
+        for agent in agents:
+            color = config.YELLOW if not agent.is_active() else config.GREEN if not agent.get_id() else config.RED
+            screen.fill(color, (left + agent.col // self.block * self.scale,
+                                top + agent.row // self.block * self.scale, self.scale, self.scale))
+        row_from, row_to, col_from, col_to = camera.view()
+        view = pygame.Rect(left + col_from * self.scale // self.block, top + row_from * self.scale // self.block,
+                           max((col_to - col_from) * self.scale // self.block, 1),
+                           max((row_to - row_from) * self.scale // self.block, 1))
+        pygame.draw.rect(screen, config.WHITE, view, 1)
+        pygame.draw.rect(screen, config.WHITE, image.get_rect(topleft=(left, top)).inflate(2, 2), 1)
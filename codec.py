@@ -0,0 +1,82 @@
+import struct
+
+from board import Board
+from mapfile import ROAD, HOLE
+from states import GameState, AgentState
+
+# encoded states: header, agent table (kind, active, flat index) and one bit per cell (1 - free road)
+HEADER = struct.Struct('<HHHh')
+AGENT = struct.Struct('<cBI')
+
+# holes and agents are both 0 bits, agents are put back from the agent table
+TO_BITS = str.maketrans({chr(c): '1' if chr(c) == ROAD else '0' for c in range(256)})
+FROM_BITS = str.maketrans({'1': ROAD, '0': HOLE})
+
+
+def encode(state):
+    rows, cols = len(state.char_map), len(state.char_map[0])
+    last = state.last_agent_played_id
+    data = [HEADER.pack(rows, cols, len(state.agents), -1 if last is None else last)]
+    for agent in state.agents:
+        row, col = agent.position()
+        data.append(AGENT.pack(agent.kind().encode(), agent.is_active(), row * cols + col))
+    bits = ''.join(''.join(row) for row in state.char_map).translate(TO_BITS)
+    bits += '0' * (-len(bits) % 8)
+    data.append(int(bits, 2).to_bytes(len(bits) // 8, 'big'))
+    return b''.join(data)
+
+
+def decode(data):
+    return StateView(data).to_state()
+
+
+class StateView:
+    # Zero-copy view of an encoded state. Fields are read straight from the buffer (bytes, bytearray, mmap or
+    # shared memory), nothing is unpacked until it is asked for.
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.rows, self.cols, self.agents_len, last = HEADER.unpack_from(self.data)
+        self.last_agent_played_id = None if last < 0 else last
+        self.cells = HEADER.size + self.agents_len * AGENT.size
+
+    def __len__(self):
+        return self.cells + (self.rows * self.cols + 7) // 8
+
+    def kind(self, agent_id):
+        return AGENT.unpack_from(self.data, HEADER.size + agent_id * AGENT.size)[0].decode()
+
+    def is_active(self, agent_id):
+        return AGENT.unpack_from(self.data, HEADER.size + agent_id * AGENT.size)[1] == 1
+
+    def position(self, agent_id):
+        return divmod(AGENT.unpack_from(self.data, HEADER.size + agent_id * AGENT.size)[2], self.cols)
+
+    def is_free(self, row, col):
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return False
+        k = row * self.cols + col
+        return (self.data[self.cells + k // 8] >> (7 - k % 8)) & 1 == 1
+
+    def cell_string(self):
+        bits_len = (self.rows * self.cols + 7) // 8
+        bits = int.from_bytes(self.data[self.cells:self.cells + bits_len], 'big')
+        return format(bits, f'0{bits_len * 8}b')[:self.rows * self.cols].translate(FROM_BITS)
+
+    def board(self):
+        # builds a search board without going through a char map
+        cells = self.cell_string()
+        return Board([cells[i * self.cols:(i + 1) * self.cols] for i in range(self.rows)],
+                     [self.position(agent_id) for agent_id in range(self.agents_len)],
+                     [self.is_active(agent_id) for agent_id in range(self.agents_len)])
+
+    def to_state(self):
+        cells = self.cell_string()
+        char_map = [list(cells[i * self.cols:(i + 1) * self.cols]) for i in range(self.rows)]
+        agents = []
+        for agent_id in range(self.agents_len):
+            kind, active, index = AGENT.unpack_from(self.data, HEADER.size + agent_id * AGENT.size)
+            row, col = divmod(index, self.cols)
+            char_map[row][col] = kind.decode()
+            agents.append(AgentState(agent_id, (row, col), kind.decode(), active=active == 1))
+        return GameState(char_map, agents, self.last_agent_played_id)
@@ -3,6 +3,11 @@ import os
 # parameters
 MAX_HEIGHT = 600
 MAX_WIDTH = 1300
+FPS = 30
+MIN_TILE_SIZE = 8
+MAX_TILE_SIZE = 256
+MINIMAP_SIZE = 160
+MINIMAP_MARGIN = 8
 WIDTH = None
 HEIGHT = None
 TILE_SIZE = None
@@ -17,6 +22,7 @@ RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 DARK_GREEN = (0, 128, 0)
 YELLOW = (255, 255, 0)
+GREY = (160, 160, 160)
 
 GR_LEN = 101
 G_to_R = [((255 * i) / 100, (255 * (100 - i)) / 100, 0) for i in range(GR_LEN)]
@@ -24,3 +30,13 @@ G_to_R = [((255 * i) / 100, (255 * (100 - i)) / 100, 0) for i in range(GR_LEN)]
 GAME_FOLDER = os.path.dirname(__file__)
 IMG_FOLDER = os.path.join(GAME_FOLDER, 'img')
 MAP_FOLDER = os.path.join(GAME_FOLDER, 'maps')
+CACHE_FOLDER = os.path.join(GAME_FOLDER, '.cache')
+ATLAS_FOLDER = os.path.join(CACHE_FOLDER, 'atlas')
+REPLAY_FOLDER = os.path.join(GAME_FOLDER, 'replays')
+PROFILE_FOLDER = os.path.join(GAME_FOLDER, 'profiles')
+TRACE_FOLDER = os.path.join(GAME_FOLDER, 'traces')
+
+# persistent opening cache: entries kept (least recently used ones are evicted) and own moves it is read for
+OPENINGS_FILE = os.path.join(CACHE_FOLDER, 'openings.sqlite')
+OPENINGS_SIZE = 100000
+OPENING_MOVES = 8
@@ -0,0 +1,150 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from board import WIN, LOSS
+
+# Leaf evaluators for the search. Called with (board, me) they score a single position for agent me, batch scores
+# a whole Frontier (the children of a position) in one vectorized call. Batching needs numpy, without it the
+# search evaluates leaf by leaf.
+BATCH = numpy is not None
+
+
+class Frontier:
+    # Positions a few moves away from the board, stacked for vectorized evaluation. Every one is given by the
+    # agent positions, the cells blocked since the board (the targets of the moves) and the agent that moved last.
+    # They differ from the board only in those cells, so the board is copied only when an evaluator needs whole
+    # boards (frees).
+
+    def __init__(self, board, positions, blocked, movers):
+        self.board = board
+        self.offsets = numpy.array(board.offsets)
+        self.positions = numpy.array(positions)
+        self.blocked = numpy.array(blocked)
+        self.movers = numpy.array(movers)
+        self.active = numpy.array(board.active)
+        self.free = numpy.frombuffer(board.free, dtype=numpy.uint8)
+        self.mobility_ = None
+        self.frees_ = None
+
+    def __len__(self):
+        return len(self.positions)
+
+    def mobility(self):
+        # (positions, agents) legal move counts
+        if self.mobility_ is None:
+            neighbours = self.positions[:, :, None] + self.offsets
+            counts = self.free[neighbours].sum(axis=2, dtype=numpy.int64)
+            # blocked cells were free on the board, a cell may be listed twice
+            hit = neighbours == self.blocked[:, 0, None, None]
+            for k in range(1, self.blocked.shape[1]):
+                hit |= neighbours == self.blocked[:, k, None, None]
+            counts -= hit.sum(axis=2)
+            self.mobility_ = counts * self.active
+        return self.mobility_
+
+    def outcomes(self, me):
+        # WIN, LOSS or 0 for agent me in every position, the same way Board.outcome decides it
+        mobility = self.mobility() > 0
+        mine = mobility[:, me].copy()
+        mobility[:, me] = False
+        others = mobility.any(axis=1)
+        last = numpy.where(self.movers == me, WIN, LOSS)
+        return numpy.where(mine & ~others, WIN, numpy.where(~mine & others, LOSS, numpy.where(~mine, last, 0)))
+
+    def frees(self):
+        # (positions, cells) copies of the board with the blocked cells blocked
+        if self.frees_ is None:
+            self.frees_ = numpy.tile(self.free, (len(self), 1))
+            rows = numpy.arange(len(self))
+            for k in range(self.blocked.shape[1]):
+                self.frees_[rows, self.blocked[:, k]] = 0
+        return self.frees_
+
+
+def leaf_values(frontier, me, evaluator, win_score):
+    # scores of the positions for agent me, won and lost games score win_score like the search scores them
+    outcomes = frontier.outcomes(me)
+    return numpy.where(outcomes != 0, outcomes * win_score, evaluator.batch(frontier, me)).tolist()
+
+
+class Mobility:
+    # my legal moves against the most mobile opponent
+
+    def __call__(self, board, me):
+        others = max((board.mobility(agent_id) for agent_id in range(len(board.positions)) if agent_id != me),
+                     default=0)
+        return board.mobility(me) - others
+
+    def batch(self, frontier, me):
+        mobility = frontier.mobility()
+        mine = mobility[:, me].copy()
+        mobility = mobility.copy()
+        mobility[:, me] = 0
+        return mine - mobility.max(axis=1)
+
+
+class Territory:
+    # Cells I reach before every opponent (king moves through free cells) against the cells they reach first,
+    # cells reached at the same time belong to nobody.
+
+    def __call__(self, board, me):
+        free = bytearray(board.free)
+        offsets = board.offsets
+        mine = [board.positions[me]] if board.active[me] else []
+        theirs = [index for agent_id, index in enumerate(board.positions) if agent_id != me and board.active[agent_id]]
+        score = 0
+        while mine or theirs:
+            reached = dict()
+            for side, front in ((1, mine), (-1, theirs)):
+                for index in front:
+                    for offset in offsets:
+                        cell = index + offset
+                        if free[cell]:
+                            reached[cell] = side if reached.get(cell, side) == side else 0
+            for cell in reached:
+                free[cell] = 0
+            mine = [cell for cell, side in reached.items() if side > 0]
+            theirs = [cell for cell, side in reached.items() if side < 0]
+            score += len(mine) - len(theirs)
+        return score
+
+    def batch(self, frontier, me):
+        # both sides grow together in one (2, positions, cells) array
+        free = frontier.frees().astype(bool)
+        rows = numpy.arange(len(frontier))
+        front = numpy.zeros((2,) + free.shape, dtype=bool)
+        for agent_id in range(frontier.positions.shape[1]):
+            if frontier.active[agent_id]:
+                front[int(agent_id != me), rows, frontier.positions[:, agent_id]] = True
+        grown = numpy.empty_like(front)
+        score = numpy.zeros(len(frontier), dtype=numpy.int64)
+        while front.any():
+            # the border around the board is never free, so shifting the flat rows never wraps onto free cells
+            grown[:] = False
+            for offset in frontier.board.offsets:
+                if offset > 0:
+                    grown[:, :, offset:] |= front[:, :, :-offset]
+                else:
+                    grown[:, :, :offset] |= front[:, :, -offset:]
+            grown &= free
+            free &= ~(grown[0] | grown[1])
+            front[0] = grown[0] & ~grown[1]
+            front[1] = grown[1] & ~grown[0]
+            score += front[0].sum(axis=1) - front[1].sum(axis=1)
+        return score
+
+
+class MobilityOrder:
+    # moves to the cells with the most free neighbours first
+
+    def __call__(self, board, agent_id, moves):
+        free = board.free
+        offsets = board.offsets
+        index = board.positions[agent_id]
+        moves.sort(key=lambda k: -sum(free[index + offsets[k] + offset] for offset in offsets))
+
+
+EVALUATORS = {'mobility': Mobility, 'territory': Territory}
+ORDERERS = {'mobility': MobilityOrder}
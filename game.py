@@ -5,14 +5,23 @@ import time
 import pygame
 
 import config
+import mapfile
+import tracing
 
-from queue import Queue
+from queue import Queue, Empty
 from actions import Action
-from states import GameState
+from atlas import Atlas
+from camera import Camera, Minimap
+from states import GameState, AgentState
 from bots import BotAgent, Aki
 from students import StudentAgent
 from tiles import Hole, Road, X
-from util import TimedFunction, Timeout
+from playback import Playback
+from profiling import Profiler
+from timecontrol import TimeControl
+from replay import Replay, ReplayActions, ReplayWriter
+from scheduler import Scheduler
+from util import TimedFunction, Timeout, split_options
 
 
 class Quit(Exception):
@@ -24,76 +33,127 @@ class GameOver(Exception):
 
 
 class Game:
+    scroll_keys = {
+        pygame.K_UP: (-1, 0),
+        pygame.K_DOWN: (1, 0),
+        pygame.K_LEFT: (0, -1),
+        pygame.K_RIGHT: (0, 1)
+    }
+    zoom_keys = {
+        pygame.K_EQUALS: 2,
+        pygame.K_PLUS: 2,
+        pygame.K_KP_PLUS: 2,
+        pygame.K_MINUS: 0.5,
+        pygame.K_KP_MINUS: 0.5
+    }
+
     def __init__(self):
         self.game_steps = 0
         self.think_time = 0
+        self.turns = 0
         pygame.display.set_caption('PyStolovina')
-        self.char_map = Game.load_map(sys.argv[1] if len(sys.argv) > 1 else os.path.join(config.MAP_FOLDER, 'map0.txt'))
-        # window scaling
-        config.TILE_SIZE = min(config.MAX_HEIGHT // len(self.char_map), config.MAX_WIDTH // len(self.char_map[0]))
-        config.HEIGHT = config.TILE_SIZE * len(self.char_map)
-        config.WIDTH = config.TILE_SIZE * len(self.char_map[0])
+        args, self.options = split_options(sys.argv[1:])
+        self.char_map, self.legend = Game.load_map(args[0] if len(args) > 0 else
+                                                   os.path.join(config.MAP_FOLDER, 'map0.txt'))
+        rows, cols = len(self.char_map), len(self.char_map[0])
+        # window scaling, maps that do not fit are shown through a scrollable camera
+        config.TILE_SIZE = max(min(config.MAX_HEIGHT // rows, config.MAX_WIDTH // cols), config.MIN_TILE_SIZE)
+        config.HEIGHT = min(config.TILE_SIZE * rows, config.MAX_HEIGHT)
+        config.WIDTH = min(config.TILE_SIZE * cols, config.MAX_WIDTH)
         config.GAME_SPEED = int(config.TILE_SIZE * 2)
+        config.FPS = int(self.options.get('fps', config.FPS))
+        self.playback = Playback(self.options.get('playback', Playback.NORMAL),
+                                 int(self.options.get('speed', 4)), int(self.options.get('every', 10)))
         pygame.font.init()
         config.GAME_FONT = pygame.font.Font(None, sorted([30, 50, config.TILE_SIZE // 3])[1])
         config.RIBBON_HEIGHT = int(config.GAME_FONT.size('')[1] * 1.5)
         self.screen = pygame.display.set_mode((config.WIDTH, config.HEIGHT + config.RIBBON_HEIGHT))
+        Atlas.get(config.TILE_SIZE)
+        pygame.key.set_repeat(250, 50)
         self.agents_sprites = pygame.sprite.Group()
         self.agents = []
-        self.tiles_sprites = pygame.sprite.Group()
-        self.tiles = []
         self.x_sprites = pygame.sprite.Group()
         bots_module = __import__('bots')
         st_module = __import__('students')
         for i, row in enumerate(self.char_map):
-            map_row = []
             for j, el in enumerate(row):
-                if el == Hole.kind():
-                    t = Hole((i, j))
-                else:
-                    if el == StudentAgent.kind():  # student agent
-                        if len(self.agents) and not self.agents[0].get_id():
-                            raise Exception(f'ERR: StudentAgent already defined!')
-                        class_ = getattr(st_module, f'{sys.argv[2]}' if len(sys.argv) > 2 else StudentAgent.__name__)
-                        agent = class_((i, j), f'{StudentAgent.__name__}.png')
-                        self.agents.insert(0, agent)
-                        self.agents_sprites.add(agent)
-                    elif el in BotAgent.agent_names.keys():  # bot agent
-                        try:
-                            class_ = getattr(bots_module, BotAgent.agent_names[el])
-                        except KeyError:
-                            class_ = getattr(bots_module, Aki.__name__)
-                        agent = class_((i, j), f'{class_.__name__}.png')
-                        self.agents.append(agent)
-                        self.agents_sprites.add(agent)
-                    t = Road((i, j))
-                self.tiles_sprites.add(t)
-                map_row.append(t)
-            self.tiles.append(map_row)
-        if len(self.agents) and self.agents[0].get_id():
+                if el == StudentAgent.kind():  # student agent
+                    if len(self.agents) and self.agents[0].get_id() == 0:
+                        raise Exception(f'ERR: StudentAgent already defined!')
+                    class_ = getattr(st_module, f'{args[1]}' if len(args) > 1 else StudentAgent.__name__)
+                    agent = class_((i, j), f'{StudentAgent.__name__}.png')
+                    self.agents.insert(0, agent)
+                    self.agents_sprites.add(agent)
+                elif el in BotAgent.agent_names.keys() or el in self.legend:  # bot agent
+                    # the map legend names agents beyond the built in bots, any agent class can play as a bot
+                    name = self.legend.get(el, BotAgent.agent_names.get(el))
+                    class_ = getattr(bots_module, name, None) or getattr(st_module, name, None)
+                    if class_ is None:
+                        print(f'WARN: Agent {name} not found, {Aki.__name__} plays instead!')
+                        class_ = Aki
+                    agent = class_((i, j), Game.image_name(class_))
+                    agent.id = None
+                    if class_.kind() != el:
+                        # the agent is drawn in the state with its map character
+                        agent.char = el
+                    self.agents.append(agent)
+                    self.agents_sprites.add(agent)
+        if len(self.agents) and self.agents[0].get_id() is None:
             raise Exception(f'ERR: StudentAgent NOT defined!')
-        self.max_think_time = int(sys.argv[3]) if len(sys.argv) > 3 else 1
-        self.max_levels = int(sys.argv[4]) if len(sys.argv) > 4 else -1
-        GameState.initial_state = GameState(self.char_map, self.agents, None)
+        # ids are given per game: the student agent first, then the bots row by row (see GameState.from_char_map)
+        for agent_id, agent in enumerate(self.agents):
+            agent.id = agent_id
+        self.scheduler = Scheduler([agent.position() for agent in self.agents])
+        self.max_think_time = int(args[2]) if len(args) > 2 else 1
+        self.max_levels = int(args[3]) if len(args) > 3 else -1
+        self.time_control = TimeControl.from_options(self.options, len(self.agents), self.max_think_time)
+        self.move_time = self.max_think_time
+        self.thinking_id = None
+        self.thinking = False
+        if 'replay' in self.options:
+            replay = Replay.load(self.options['replay'])
+            replay.board(self.char_map)
+            self.replay = ReplayActions(replay)
+            self.recorder = ReplayWriter(os.devnull, self.char_map, [])
+        else:
+            self.replay = None
+            os.makedirs(config.REPLAY_FOLDER, exist_ok=True)
+            self.recorder = ReplayWriter(self.options.get('record', os.path.join(
+                config.REPLAY_FOLDER, f'{time.strftime("%Y%m%d-%H%M%S")}.rpl')), self.char_map,
+                [(agent.map_char(), agent.position(), type(agent).__name__) for agent in self.agents])
+        self.profiler = Profiler.from_options(self.options, os.path.join(
+            config.PROFILE_FOLDER, time.strftime("%Y%m%d-%H%M%S")))
+        tracing.start(tracing.Tracer.from_options(self.options, config.TRACE_FOLDER))
+        GameState.initial_state = GameState(self.char_map, [AgentState.of(agent) for agent in self.agents], None)
         self.state = GameState.initial_state.copy()
+        # only the cells inside the camera view get tile sprites
+        self.camera = Camera(rows, cols, config.WIDTH, config.HEIGHT)
+        if len(self.agents):
+            self.camera.center_on(self.agents[0].position())
+        self.minimap = Minimap(self.char_map)
+        self.tiles = dict()
+        self.background = pygame.Surface((config.WIDTH, config.HEIGHT)).convert()
+        self.shown_view = None
         self.clock = pygame.time.Clock()
+        self.ribbon_cache = dict()
+        self.ribbon_shown = None
+        self.next_ribbon = 0
         self.running = True
         self.playing = False
         self.game_over = False
 
     @staticmethod
     def load_map(map_name):
-        try:
-            with open(map_name, 'r') as f:
-                matrix = []
-                while True:
-                    line = f.readline().strip()
-                    if not len(line):
-                        break
-                    matrix.append([c for c in line])
-            return matrix
-        except Exception as e:
-            raise e
+        # text maps for small hand-made boards, binary maps for generated ones, (char_map, legend)
+        return mapfile.read(map_name)
+
+    @staticmethod
+    def image_name(class_):
+        # the image of the closest bot class that has one
+        for base in class_.__mro__:
+            if base is not StudentAgent and os.path.exists(os.path.join(config.IMG_FOLDER, f'{base.__name__}.png')):
+                return f'{base.__name__}.png'
+        return f'{Aki.__name__}.png'
 
     def activate_agent(self, agent_id):
         self.agents[agent_id].set_active(True)
@@ -107,18 +167,20 @@ class Game:
     def deactivate_agent(self, agent_id):
         self.agents[agent_id].set_active(False)
         self.state.agents[agent_id].set_active(False)
+        self.scheduler.remove(agent_id)
         self.x_sprites.add(X(self.agents[agent_id].position()))
         self.draw()
 
+    @tracing.traced()
     def check_game_status(self):
-        self.state.adjust_win_loss()
-        for agent_id in range(len(self.agents)):
+        # only the agents next to the last move can have lost their legal actions
+        for agent_id in self.scheduler.take_changed():
             if self.agents[agent_id].is_active() and not self.agents[agent_id].get_legal_actions(self.state):
                 self.deactivate_agent(agent_id)
+        self.state.adjust_win_loss(self.scheduler.rotation)
 
-        if self.state.is_win() or self.state.is_loss() or all(not agent.is_active() for agent in self.agents):
-            if self.state.last_agent_played_id is not None and \
-                    all([not len(self.state.get_legal_actions(agent_id)) for agent_id in range(len(self.agents))]):
+        if self.state.is_win() or self.state.is_loss() or not self.scheduler.rotation:
+            if self.state.last_agent_played_id is not None and not self.scheduler.rotation:
                 self.activate_agent(self.state.last_agent_played_id)
             raise GameOver()
 
@@ -128,87 +190,217 @@ class Game:
             while self.running:
                 try:
                     if self.playing and not self.game_over:
-                        for agent_id, agent in enumerate(self.agents):
+                        for agent_id in self.scheduler.round():
+                            agent = self.agents[agent_id]
                             self.check_game_status()
                             if not agent.is_active():
                                 continue
                             legal_actions = agent.get_legal_actions(self.state)
-                            try:
-                                tf_queue = Queue(1)
-                                tf = TimedFunction(threading.current_thread().ident,
-                                                   tf_queue, self.max_think_time, agent.get_next_action, self.state,
-                                                   self.max_levels)
-                                tf.setDaemon(True)
-                                tf.start()
-                                start_time = time.time()
-                                sleep_time = 0.001
-                                while tf_queue.empty():
-                                    time.sleep(sleep_time)
-                                    self.think_time = time.time() - start_time
-                                    self.draw_ribbon()
-                                    self.events()
-                                action, elapsed = tf_queue.get(block=False)
-                                print(f'Action time elapsed: {elapsed:.3f}')
-                            except Timeout:
-                                print(f'WARN: Agent {agent_id} action took more than {self.max_think_time} seconds!')
-                                self.deactivate_agent(agent_id)
-                                continue
+                            if self.replay:
+                                action = self.replay.next_action()
+                            else:
+                                action = self.think(agent_id, agent)
                             if not legal_actions or action is None or action not in legal_actions:
+                                self.recorder.record(None)
                                 self.deactivate_agent(agent_id)
                                 continue
+                            self.recorder.record(action)
                             print(f'On position {agent.position()} Agent {agent_id} chose action {action} from '
                                   f'legal actions {legal_actions}')
-                            self.state = self.state.apply_action(agent_id, action)
-                            old_position = agent.position()
-                            new_position = tuple(map(sum, zip(agent.position(), Action.actions[action])))
-                            while True:
-                                agent.move_towards(new_position)
-                                if agent.is_in_tile():
-                                    x, y = old_position
-                                    self.tiles_sprites.remove(self.tiles[x][y])
-                                    hole = Hole(old_position)
-                                    self.tiles_sprites.add(hole)
-                                    self.tiles[x][y] = hole
+                            with tracing.span('apply_action', agent=agent_id):
+                                self.state = self.state.apply_action(agent_id, action)
+                                old_position = agent.position()
+                                new_position = tuple(map(sum, zip(agent.position(), Action.actions[action])))
+                                self.scheduler.moved(agent_id, old_position, new_position)
+                            self.turns += 1
+                            with tracing.span('animate', agent=agent_id):
+                                while self.playback.animate() and self.rendering():
+                                    agent.move_towards(new_position, self.playback.step())
+                                    if agent.is_in_tile():
+                                        break
+                                    self.clock.tick(config.GAME_SPEED)
                                     self.draw()
-                                    break
-                                self.clock.tick(config.GAME_SPEED)
-                                self.draw()
-                                self.events()
-                                while not self.playing:
                                     self.events()
+                                    while not self.playing:
+                                        self.clock.tick(config.FPS)
+                                        self.events()
+                            self.set_hole(old_position)
                             agent.place_to(new_position)
+                            self.draw()
                         self.game_steps += 1
                         self.draw_ribbon()
+                    else:
+                        self.clock.tick(config.FPS)
                     self.events()
                 except GameOver:
                     self.game_over = True
+                    self.recorder.close()
+                    self.print_profile()
+                    self.save_trace()
                     self.draw()
+                    self.draw_ribbon(force=True)
         except Quit:
             self.quit()
         except Exception as e:
             self.quit()
             raise e
 
+    def think(self, agent_id, agent):
+        self.move_time = self.time_control.start_move(agent_id)
+        self.thinking_id = agent_id
+        # iteratively deepening agents stop in time on their own
+        agent.max_think_time = self.move_time
+        agent.time_left = self.time_control.time_left(agent_id)
+        try:
+            tf_queue = Queue(1)
+            method = agent.get_next_action
+            if self.profiler is not None:
+                method = self.profiler.wrap(method, agent_id, self.turns, agent.position())
+            tf = TimedFunction(threading.current_thread().ident,
+                               tf_queue, self.move_time, method, self.state, self.max_levels)
+            tf.track = tracing.agent_track(agent_id)
+            tf.setDaemon(True)
+            tf.start()
+            self.thinking = True
+            with tracing.span('wait_for_action', agent=agent_id):
+                action, elapsed = self.wait_for_action(tf_queue)
+            self.thinking = False
+            self.time_control.spend(agent_id, elapsed)
+            if self.time_control.banked():
+                print(f'Action time elapsed: {elapsed:.3f}, time bank left: {self.time_control.time_left(agent_id):.3f}')
+            else:
+                print(f'Action time elapsed: {elapsed:.3f}')
+            return action
+        except Timeout:
+            self.thinking = False
+            self.time_control.spend(agent_id, self.move_time)
+            print(f'WARN: Agent {agent_id} action took more than {self.move_time:.3f} seconds!')
+            return None
+
+    def wait_for_action(self, tf_queue):
+        # the viewer runs on its own frame schedule while the agent is thinking,
+        # so the search thread is not starved by redraws
+        start_time = time.time()
+        frame_time = 1 / config.FPS
+        while True:
+            try:
+                return tf_queue.get(timeout=frame_time)
+            except Empty:
+                self.think_time = time.time() - start_time
+                self.draw_ribbon()
+                self.events()
+
     def quit(self):
+        if not self.game_over:
+            self.print_profile()
+            self.save_trace()
         self.game_over = True
         self.running = False
+        self.recorder.close()
 
-    def draw_ribbon(self):
-        self.screen.fill(config.BLACK, rect=(0, config.HEIGHT, config.WIDTH, config.RIBBON_HEIGHT))
+    def print_profile(self):
+        if self.profiler is not None:
+            print(self.profiler.summary())
+
+    def save_trace(self):
+        path = tracing.save()
+        if path is not None:
+            print(f'Trace saved to {path}')
+
+    def render_text(self, slot, text, color):
+        cached = self.ribbon_cache.get(slot)
+        if cached is None or cached[0] != (text, color):
+            cached = ((text, color), config.GAME_FONT.render(text, True, color))
+            self.ribbon_cache[slot] = cached
+        return cached[1]
+
+    @tracing.traced()
+    def draw_ribbon(self, force=False):
+        now = time.time()
+        if not force and now < self.next_ribbon:
+            return
+        self.next_ribbon = now + 1 / config.FPS
         steps_str = f'Steps: {str(self.game_steps)}'
-        steps = config.GAME_FONT.render(steps_str, True, config.GREEN)
-        self.screen.blit(steps, (config.RIBBON_HEIGHT // 5, config.HEIGHT + config.RIBBON_HEIGHT // 5))
         think_time_str = f'Time: {self.think_time:.3f}'
-        tt_color = min(int(self.think_time / self.max_think_time * 100), 100)
-        think_time = config.GAME_FONT.render(think_time_str, True, config.G_to_R[tt_color])
-        self.screen.blit(think_time, (config.GAME_FONT.size(steps_str)[0] + 2 * config.RIBBON_HEIGHT // 5,
+        tt_color = min(int(self.think_time / self.move_time * 100), 100) if self.move_time else 100
+        if self.time_control.banked() and self.thinking_id is not None:
+            # the bank of the agent that is thinking, as it runs down
+            bank = self.time_control.time_left(self.thinking_id)
+            if self.thinking:
+                bank = max(bank - self.think_time, 0)
+            think_time_str += f'  Bank {self.thinking_id}: {bank:.1f}'
+        playback_str = f'Playback: {self.playback}'
+        if self.ribbon_shown == (steps_str, think_time_str, tt_color, playback_str):
+            return
+        self.ribbon_shown = (steps_str, think_time_str, tt_color, playback_str)
+        ribbon_rect = pygame.Rect(0, config.HEIGHT, config.WIDTH, config.RIBBON_HEIGHT)
+        self.screen.fill(config.BLACK, rect=ribbon_rect)
+        steps = self.render_text('steps', steps_str, config.GREEN)
+        self.screen.blit(steps, (config.RIBBON_HEIGHT // 5, config.HEIGHT + config.RIBBON_HEIGHT // 5))
+        think_time = self.render_text('think_time', think_time_str, config.G_to_R[tt_color])
+        self.screen.blit(think_time, (steps.get_width() + 2 * config.RIBBON_HEIGHT // 5,
                                       config.HEIGHT + config.RIBBON_HEIGHT // 5))
-        pygame.display.flip()
+        playback = self.render_text('playback', playback_str, config.WHITE)
+        self.screen.blit(playback, (steps.get_width() + think_time.get_width() + 3 * config.RIBBON_HEIGHT // 5,
+                                    config.HEIGHT + config.RIBBON_HEIGHT // 5))
+        pygame.display.update(ribbon_rect)
+
+    def rendering(self):
+        return self.game_over or self.playback.render(self.turns)
+
+    @tracing.traced()
+    def update_view(self):
+        view_key = (self.camera.x, self.camera.y, config.TILE_SIZE)
+        if self.shown_view == view_key:
+            return
+        self.shown_view = view_key
+        row_from, row_to, col_from, col_to = self.camera.view()
+        for position in [p for p in self.tiles if not (row_from <= p[0] < row_to and col_from <= p[1] < col_to)]:
+            del self.tiles[position]
+        self.background.fill(config.BLACK)
+        for i in range(row_from, row_to):
+            row = self.state.char_map[i]
+            for j in range(col_from, col_to):
+                tile = self.tiles.get((i, j))
+                if tile is None:
+                    tile = Hole((i, j)) if row[j] == Hole.kind() else Road((i, j))
+                    self.tiles[(i, j)] = tile
+                self.background.blit(tile.image, self.camera.to_screen(tile.rect))
+
+    def set_hole(self, position):
+        self.minimap.set_hole(position)
+        if position in self.tiles:
+            hole = Hole(position)
+            self.tiles[position] = hole
+            self.background.blit(hole.image, self.camera.to_screen(hole.rect))
+
+    def zoom(self, factor):
+        tile_size = min(max(int(config.TILE_SIZE * factor), config.MIN_TILE_SIZE),
+                        max(config.MAX_TILE_SIZE, config.TILE_SIZE))
+        if tile_size == config.TILE_SIZE:
+            return
+        center = self.camera.center()
+        config.TILE_SIZE = tile_size
+        config.GAME_SPEED = int(config.TILE_SIZE * 2)
+        for sprite in self.agents + self.x_sprites.sprites():
+            sprite.rescale()
+        self.tiles.clear()
+        self.camera.center_on(center)
+        self.draw()
 
+    @tracing.traced()
     def draw(self):
-        self.tiles_sprites.draw(self.screen)
-        self.agents_sprites.draw(self.screen)
-        self.x_sprites.draw(self.screen)
+        if not self.rendering():
+            return
+        self.update_view()
+        self.screen.set_clip((0, 0, config.WIDTH, config.HEIGHT))
+        self.screen.blit(self.background, (0, 0))
+        view = self.camera.rect()
+        for sprite in self.agents + self.x_sprites.sprites():
+            if view.colliderect(sprite.rect):
+                self.screen.blit(sprite.image, self.camera.to_screen(sprite.rect))
+        if not self.camera.covers_map():
+            self.minimap.draw(self.screen, self.camera, self.agents)
 
         if self.game_over:
             if self.state.is_win():
@@ -219,14 +411,29 @@ class Game:
                 game_over = config.GAME_FONT.render('Game over', True, config.WHITE)
             text_rect = game_over.get_rect(center=(config.WIDTH // 2, config.HEIGHT // 2))
             self.screen.blit(game_over, text_rect)
+        self.screen.set_clip(None)
         pygame.display.flip()
 
+    @tracing.traced()
     def events(self):
         # catch all events here
         for event in pygame.event.get():
             if event.type == pygame.QUIT or event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 raise Quit()
-            if self.game_over:
+            if event.type == pygame.KEYDOWN and event.key in Game.scroll_keys:
+                self.camera.scroll(*Game.scroll_keys[event.key])
+                self.draw()
+            elif event.type == pygame.KEYDOWN and event.key in Game.zoom_keys:
+                self.zoom(Game.zoom_keys[event.key])
+            elif event.type == pygame.MOUSEWHEEL and event.y:
+                self.zoom(2 if event.y > 0 else 0.5)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_c and len(self.agents):
+                self.camera.center_on(self.agents[0].position())
+                self.draw()
+            elif self.game_over:
                 return
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
                 self.playing = not self.playing
+            elif event.type == pygame.KEYDOWN and self.playback.handle_key(event.key):
+                self.draw()
+                self.draw_ribbon(force=True)
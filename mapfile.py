@@ -0,0 +1,145 @@
+import hashlib
+import struct
+
+ROAD = 'r'
+HOLE = 'h'
+STUDENT = '0'
+# the bot classes of the built in map characters, a map legend names the classes of other characters
+BOT_NAMES = {'1': 'Aki', '2': 'Jocke', '3': 'Draza', '4': 'Bole'}
+
+# binary maps: header, agent table (kind, flat index), one bit per cell (1 - not a hole) and the legend
+MAGIC = b'PSTM'
+VERSION = 2
+HEADER = struct.Struct('<4sBIIH')
+AGENT = struct.Struct('<cI')
+LEGEND = struct.Struct('<H')
+
+TO_BITS = str.maketrans({ROAD: '1', HOLE: '0'})
+FROM_BITS = str.maketrans({'1': ROAD, '0': HOLE})
+
+
+def load(map_name):
+    return read(map_name)[0]
+
+
+def read(map_name):
+    # (char_map, legend) of a text or binary map
+    with open(map_name, 'rb') as f:
+        data = f.read()
+    if data.startswith(MAGIC):
+        return unpack(data), unpack_legend(data)
+    text = data.decode()
+    return parse(text), parse_legend(text)
+
+
+def save(char_map, map_name, legend=None):
+    if map_name.endswith('.txt'):
+        with open(map_name, 'w') as f:
+            f.write(format_text(char_map))
+            if legend:
+                f.write('\n\n' + format_legend(legend))
+    else:
+        with open(map_name, 'wb') as f:
+            f.write(pack(char_map, legend))
+
+
+def parse(text):
+    # the map ends with the first empty line
+    matrix = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not len(line):
+            break
+        matrix.append([c for c in line])
+    return matrix
+
+
+def parse_legend(text):
+    # Agent characters beyond the built in ones are named after the map, one 'character=ClassName' line each:
+    #   rrrr
+    #   r0ab
+    #
+    #   a=Aki
+    #   b=MinimaxABAgent
+    lines = [line.strip() for line in text.splitlines()]
+    while lines and not lines[0]:
+        lines.pop(0)
+    if '' not in lines:
+        return dict()
+    return read_legend(lines[lines.index('') + 1:])
+
+
+def read_legend(lines):
+    legend = dict()
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        kind, _, name = line.partition('=')
+        kind, name = kind.strip(), name.strip()
+        if len(kind) != 1 or not kind.isascii() or kind in (ROAD, HOLE) or not name:
+            raise Exception(f'ERR: Bad map legend line "{line}"!')
+        legend[kind] = name
+    return legend
+
+
+def format_legend(legend):
+    return '\n'.join(f'{kind}={name}' for kind, name in legend.items())
+
+
+def format_text(char_map):
+    return '\n'.join(''.join(row) for row in char_map)
+
+
+def map_hash(char_map):
+    return hashlib.sha1(format_text(char_map).encode()).digest()
+
+
+def find_agents(char_map):
+    agents = []
+    for i, row in enumerate(char_map):
+        line = ''.join(row)
+        for kind in set(line) - {ROAD, HOLE}:
+            j = line.find(kind)
+            while j >= 0:
+                agents.append((i, j, kind))
+                j = line.find(kind, j + 1)
+    agents.sort()
+    return agents
+
+
+def pack(char_map, legend=None):
+    rows, cols = len(char_map), len(char_map[0])
+    agents = find_agents(char_map)
+    table = dict(TO_BITS)
+    table.update({ord(kind): '1' for _, _, kind in agents})
+    bits = ''.join(''.join(row) for row in char_map).translate(table)
+    bits += '0' * (-len(bits) % 8)
+    header = HEADER.pack(MAGIC, VERSION, rows, cols, len(agents))
+    agent_table = b''.join(AGENT.pack(kind.encode(), i * cols + j) for i, j, kind in agents)
+    legend = format_legend(legend or {}).encode()
+    return header + agent_table + int(bits, 2).to_bytes(len(bits) // 8, 'big') + LEGEND.pack(len(legend)) + legend
+
+
+def unpack(data):
+    magic, version, rows, cols, agents_len = HEADER.unpack_from(data)
+    if magic != MAGIC or version not in (1, VERSION):
+        raise Exception(f'ERR: Unsupported binary map (version {version})!')
+    offset = HEADER.size + agents_len * AGENT.size
+    bits_len = (rows * cols + 7) // 8
+    cells = format(int.from_bytes(data[offset:offset + bits_len], 'big'), f'0{bits_len * 8}b').translate(FROM_BITS)
+    matrix = [list(cells[i * cols:(i + 1) * cols]) for i in range(rows)]
+    for k in range(agents_len):
+        kind, index = AGENT.unpack_from(data, HEADER.size + k * AGENT.size)
+        matrix[index // cols][index % cols] = kind.decode()
+    return matrix
+
+
+def unpack_legend(data):
+    magic, version, rows, cols, agents_len = HEADER.unpack_from(data)
+    if version < 2:
+        return dict()
+    offset = HEADER.size + agents_len * AGENT.size + (rows * cols + 7) // 8
+    legend_len, = LEGEND.unpack_from(data, offset)
+    offset += LEGEND.size
+    return read_legend(bytes(data[offset:offset + legend_len]).decode().splitlines())
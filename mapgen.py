@@ -0,0 +1,86 @@
+import argparse
+import random
+
+import mapfile
+
+SYMMETRIES = ('none', 'mirror', 'flip', 'rotate', 'quad', 'rot90')
+
+
+def orbit(position, rows, cols, symmetry):
+    # all the cells a cell is mapped to by the symmetry group
+    i, j = position
+    if symmetry == 'mirror':
+        cells = {(i, j), (i, cols - 1 - j)}
+    elif symmetry == 'flip':
+        cells = {(i, j), (rows - 1 - i, j)}
+    elif symmetry == 'rotate':
+        cells = {(i, j), (rows - 1 - i, cols - 1 - j)}
+    elif symmetry == 'quad':
+        cells = {(i, j), (i, cols - 1 - j), (rows - 1 - i, j), (rows - 1 - i, cols - 1 - j)}
+    elif symmetry == 'rot90':
+        n = rows - 1
+        cells = {(i, j), (j, n - i), (n - i, n - j), (n - j, i)}
+    else:
+        cells = {(i, j)}
+    return sorted(cells)
+
+
+def lineup(agents, bots):
+    return '0' + ''.join(bots[k % len(bots)] for k in range(agents - 1))
+
+
+def generate(rows, cols, holes=0.2, agents=2, bots='1', symmetry='none', seed=None):
+    if symmetry not in SYMMETRIES:
+        raise Exception(f'ERR: {symmetry} is not a map symmetry! Symmetries are ({", ".join(SYMMETRIES)})')
+    if symmetry == 'rot90' and rows != cols:
+        raise Exception('ERR: rot90 symmetry needs a square map!')
+    rnd = random.Random(seed)
+    matrix = [[mapfile.ROAD] * cols for _ in range(rows)]
+    for i in range(rows):
+        for j in range(cols):
+            if symmetry == 'none':
+                if rnd.random() < holes:
+                    matrix[i][j] = mapfile.HOLE
+                continue
+            cells = orbit((i, j), rows, cols, symmetry)
+            if cells[0] == (i, j) and rnd.random() < holes:
+                for k, l in cells:
+                    matrix[k][l] = mapfile.HOLE
+
+    def playable(cell):
+        k, l = cell
+        return matrix[k][l] == mapfile.ROAD and any(
+            matrix[k + di][l + dj] == mapfile.ROAD for di in (-1, 0, 1) for dj in (-1, 0, 1)
+            if (di or dj) and 0 <= k + di < rows and 0 <= l + dj < cols)
+
+    # agents are placed on whole orbits (as far as they go), so every agent gets an equivalent start
+    kinds = list(lineup(agents, bots))
+    candidates = [(i, j) for i in range(rows) for j in range(cols) if matrix[i][j] == mapfile.ROAD]
+    rnd.shuffle(candidates)
+    for cell in candidates:
+        if not kinds:
+            break
+        cells = orbit(cell, rows, cols, symmetry)
+        if not all(playable(c) for c in cells):
+            cells = [cell] if playable(cell) else []
+        rnd.shuffle(cells)
+        for k, l in cells[:len(kinds)]:
+            matrix[k][l] = kinds.pop(0)
+    if kinds:
+        raise Exception(f'ERR: Not enough free cells for {agents} agents!')
+    return matrix
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generates a PyStolovina map.')
+    parser.add_argument('output', help='map file, .txt for a text map, anything else for a binary map')
+    parser.add_argument('--rows', type=int, default=8)
+    parser.add_argument('--cols', type=int, default=None)
+    parser.add_argument('--holes', type=float, default=0.2, help='share of cells that are holes')
+    parser.add_argument('--agents', type=int, default=2, help='number of agents, including the student agent')
+    parser.add_argument('--bots', default='1', help='bot kinds to cycle through, e.g. 12 for Aki and Jocke')
+    parser.add_argument('--symmetry', choices=SYMMETRIES, default='none')
+    parser.add_argument('--seed', type=int, default=None)
+    a = parser.parse_args()
+    char_map = generate(a.rows, a.cols if a.cols else a.rows, a.holes, a.agents, a.bots, a.symmetry, a.seed)
+    mapfile.save(char_map, a.output)
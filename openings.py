@@ -0,0 +1,139 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+
+import config
+import evaluation
+import mapfile
+import perft
+import search
+
+from board import Board
+from states import GameState
+
+
+def lineup(state, legend=None):
+    # the bot classes in id order, the student agent (of any class) as 0
+    names = []
+    for agent in state.agents:
+        kind = agent.kind()
+        if kind == mapfile.STUDENT:
+            names.append(kind)
+        else:
+            names.append(agent.name or (legend or {}).get(kind) or mapfile.BOT_NAMES.get(kind, kind))
+    return ','.join(names)
+
+
+class OpeningBook:
+    # Persistent cache of deep search results for the positions after the first moves of a map, in sqlite so
+    # games, the server workers and the precompute command can share it. An entry is keyed by the hash of the
+    # starting map, the agent lineup, the position (canonical under the symmetries of the map, see
+    # symmetry.canonical) and the agent to move, and holds the best move (for the representative position), its
+    # score and the depth searched. Beyond size entries the least recently used ones are evicted.
+
+    def __init__(self, path=config.OPENINGS_FILE, size=config.OPENINGS_SIZE):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.size = size
+        self.connection = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS openings (map BLOB, lineup TEXT, position BLOB, '
+                                'agent INTEGER, action TEXT, score REAL, depth INTEGER, used REAL, '
+                                'PRIMARY KEY (map, lineup, position, agent))')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS openings_used ON openings (used)')
+        self.connection.commit()
+        self.map_hashes = dict()
+
+    def key(self, state, agent_id, legend=None):
+        # GameState.initial_state is the starting map, its symmetries make the canonical positions
+        initial = GameState.initial_state if GameState.initial_state is not None else state
+        if id(initial) not in self.map_hashes:
+            self.map_hashes = {id(initial): mapfile.map_hash(initial.char_map)}
+        position, transform = state.canonical()
+        return (self.map_hashes[id(initial)], lineup(state, legend), hashlib.sha1(position).digest(),
+                agent_id), transform
+
+    def get(self, state, agent_id, min_depth=0, max_depth=None, legend=None):
+        # (action, score, depth) stored for the agent to move in the state, None if there is no entry searched
+        # between min_depth and max_depth (None - no limit) levels deep
+        key, transform = self.key(state, agent_id, legend)
+        query = 'SELECT action, score, depth FROM openings WHERE map = ? AND lineup = ? AND position = ? AND ' \
+                'agent = ? AND depth >= ?'
+        params = key + (min_depth,)
+        if max_depth is not None:
+            query += ' AND depth <= ?'
+            params += (max_depth,)
+        row = self.connection.execute(query, params).fetchone()
+        if row is None:
+            return None
+        self.connection.execute('UPDATE openings SET used = ? WHERE map = ? AND lineup = ? AND position = ? AND '
+                                'agent = ?', (time.time(),) + key)
+        self.connection.commit()
+        action, score, depth = row
+        return transform.inverse().action(action), score, depth
+
+    def put(self, state, agent_id, action, score, depth, legend=None):
+        # keeps the deeper of two results for a position
+        key, transform = self.key(state, agent_id, legend)
+        self.connection.execute('INSERT INTO openings VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+                                'ON CONFLICT (map, lineup, position, agent) DO UPDATE SET action = excluded.action, '
+                                'score = excluded.score, depth = excluded.depth, used = excluded.used '
+                                'WHERE excluded.depth >= openings.depth',
+                                key + (transform.action(action), score, depth, time.time()))
+        self.connection.execute('DELETE FROM openings WHERE rowid IN (SELECT rowid FROM openings ORDER BY used DESC '
+                                'LIMIT -1 OFFSET ?)', (self.size,))
+        self.connection.commit()
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM openings').fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+
+def precompute(book, state, agent_ids, plies, think_time, max_levels, legend=None, make_search=None, agent_id=0):
+    # Searches every position where one of agent_ids moves within the first plies moves (in the turn order of
+    # Game.run) and stores the results. The searched agents play their best move, every other agent all of its
+    # legal moves. Returns the number of positions searched.
+    if plies <= 0 or perft.is_over(state):
+        return 0
+    agent_id = perft.next_agent(len(state.agents), agent_id, lambda k: state.agents[k].is_active())
+    next_id = (agent_id + 1) % len(state.agents)
+    if agent_id not in agent_ids:
+        return sum(precompute(book, state.apply_action(agent_id, action), agent_ids, plies - 1, think_time,
+                              max_levels, legend, make_search, next_id)
+                   for action in state.get_legal_actions(agent_id))
+    searched = 0
+    entry = book.get(state, agent_id, max_levels if max_levels >= 0 else 0, legend=legend)
+    if entry is None:
+        score, action, depth = make_search().deepen(Board.from_state(state), agent_id, max_levels,
+                                                    time.time() + think_time, search.ASPIRATION)
+        book.put(state, agent_id, action, score, depth, legend)
+        searched = 1
+    else:
+        action = entry[0]
+    return searched + precompute(book, state.apply_action(agent_id, action), agent_ids, plies - 1, think_time,
+                                 max_levels, legend, make_search, next_id)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fills the PyStolovina opening cache with deep searches.')
+    parser.add_argument('maps', nargs='+')
+    parser.add_argument('--plies', type=int, default=4, help='moves from the start of the game covered')
+    parser.add_argument('--agents', type=int, nargs='+', default=[0], help='ids of the agents searched')
+    parser.add_argument('--time', type=float, default=5, help='seconds per searched position')
+    parser.add_argument('--depth', type=int, default=-1, help='plies searched at most (-1 - until the time ends)')
+    parser.add_argument('--evaluator', choices=evaluation.EVALUATORS.keys(), default='mobility')
+    parser.add_argument('--cache', default=config.OPENINGS_FILE)
+    parser.add_argument('--size', type=int, default=config.OPENINGS_SIZE, help='entries kept')
+    a = parser.parse_args()
+    book = OpeningBook(a.cache, a.size)
+    for map_name in a.maps:
+        char_map, legend = mapfile.read(map_name)
+        GameState.initial_state = GameState.from_char_map(char_map)
+        start_time = time.time()
+        searched = precompute(book, GameState.initial_state.copy(), set(a.agents), a.plies, a.time, a.depth, legend,
+                              lambda: search.Search(search.PVS, evaluation.EVALUATORS[a.evaluator](), True))
+        print(f'{map_name}: {searched} positions searched in {time.time() - start_time:.1f}s')
+    print(f'{len(book)} positions in {a.cache}')
+    book.close()
@@ -0,0 +1,101 @@
+import argparse
+import time
+
+import mapfile
+
+from board import ACTIONS, Board
+from states import GameState
+
+# Counts the positions reachable in exactly depth moves, played in the turn order of Game.run: agents move in id
+# order, the agents without legal actions are deactivated before every turn and a game that is over (see
+# GameState.adjust_win_loss) ends its branch without adding to the count.
+
+
+def next_agent(agents_len, agent_id, active):
+    # the first active agent from agent_id on in the round order
+    for k in range(agents_len):
+        if active((agent_id + k) % agents_len):
+            return (agent_id + k) % agents_len
+    return None
+
+
+def is_over(state):
+    # Game.check_game_status on a state of its own
+    for agent in state.agents:
+        if agent.is_active() and not state.get_legal_actions(agent.get_id()):
+            agent.set_active(False)
+    state.adjust_win_loss()
+    return state.is_win() or state.is_loss() or not any(agent.is_active() for agent in state.agents)
+
+
+def perft(state, agent_id, depth):
+    if depth == 0:
+        return 1
+    if is_over(state):
+        return 0
+    agent_id = next_agent(len(state.agents), agent_id, lambda k: state.agents[k].is_active())
+    nodes = 0
+    for action in state.get_legal_actions(agent_id):
+        nodes += perft(state.apply_action(agent_id, action), (agent_id + 1) % len(state.agents), depth - 1)
+    return nodes
+
+
+def perft_board(board, agent_id, depth, last_agent_played_id=None):
+    # the same count on a Board with make/undo
+    if depth == 0:
+        return 1
+    active = board.active
+    board.active = list(active)
+    board.deactivate_stuck()
+    nodes = 0
+    if not board.is_over(last_agent_played_id):
+        agent_id = next_agent(len(board.positions), agent_id, lambda k: board.active[k])
+        for action in board.moves(agent_id):
+            origin = board.move(agent_id, action)
+            nodes += perft_board(board, (agent_id + 1) % len(board.positions), depth - 1, agent_id)
+            board.undo(agent_id, origin)
+    board.active = active
+    return nodes
+
+
+def divide(state, agent_id, depth, backend='state'):
+    # {action: count} of every root move
+    counts = {}
+    if depth == 0 or is_over(state):
+        return counts
+    agent_id = next_agent(len(state.agents), agent_id, lambda k: state.agents[k].is_active())
+    board = Board.from_state(state)
+    for action in state.get_legal_actions(agent_id):
+        next_id = (agent_id + 1) % len(state.agents)
+        if backend == 'board':
+            origin = board.move(agent_id, ACTIONS.index(action))
+            counts[action] = perft_board(board, next_id, depth - 1, agent_id)
+            board.undo(agent_id, origin)
+        else:
+            counts[action] = perft(state.apply_action(agent_id, action), next_id, depth - 1)
+    return counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Counts the PyStolovina positions reachable in a number of moves.')
+    parser.add_argument('map')
+    parser.add_argument('depth', type=int)
+    parser.add_argument('--agent', type=int, default=0, help='id of the agent that moves first')
+    parser.add_argument('--divide', action='store_true', help='counts per root move')
+    parser.add_argument('--backend', choices=('state', 'board'), default='state')
+    a = parser.parse_args()
+    initial = GameState.from_char_map(mapfile.load(a.map))
+    if not 0 <= a.agent < len(initial.agents):
+        raise Exception(f'ERR: No agent {a.agent} on the map!')
+    start_time = time.time()
+    if a.divide:
+        counts = divide(initial, a.agent, a.depth, a.backend)
+        for action, count in counts.items():
+            print(f'{action}: {count}')
+        nodes = sum(counts.values())
+    elif a.backend == 'board':
+        nodes = perft_board(Board.from_state(initial), a.agent, a.depth)
+    else:
+        nodes = perft(initial, a.agent, a.depth)
+    elapsed = time.time() - start_time
+    print(f'nodes {nodes}  time {elapsed:.3f}s  {nodes / max(elapsed, 1e-9):.0f} nodes/s')
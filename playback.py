@@ -0,0 +1,60 @@
+import pygame
+
+
+class Playback:
+    NORMAL = 'normal'  # moves are animated one pixel per frame
+    FAST = 'fast'  # moves are animated speed pixels per frame
+    JUMP = 'jump'  # agents jump straight to the end of the move
+    SPARSE = 'sparse'  # the board is rendered only every Kth turn
+    NONE = 'none'  # nothing is rendered until the game is over
+    modes = (NORMAL, FAST, JUMP, SPARSE, NONE)
+    keys = {
+        pygame.K_n: NORMAL,
+        pygame.K_f: FAST,
+        pygame.K_j: JUMP,
+        pygame.K_k: SPARSE,
+        pygame.K_h: NONE
+    }
+    MAX_SPEED = 64
+
+    def __init__(self, mode=NORMAL, speed=4, every=10):
+        if mode not in Playback.modes:
+            raise Exception(f'ERR: {mode} is not a playback mode! '
+                            f'Playback modes are ({", ".join(Playback.modes)})')
+        self.mode = mode
+        self.speed = min(max(speed, 1), Playback.MAX_SPEED)
+        self.every = max(every, 1)
+
+    def __str__(self):
+        if self.mode == Playback.FAST:
+            return f'{self.speed}x'
+        if self.mode == Playback.SPARSE:
+            return f'1/{self.every}'
+        return self.mode
+
+    def animate(self):
+        return self.mode in (Playback.NORMAL, Playback.FAST)
+
+    def step(self):
+        return self.speed if self.mode == Playback.FAST else 1
+
+    def render(self, turn):
+        if self.mode == Playback.NONE:
+            return False
+        if self.mode == Playback.SPARSE:
+            return not turn % self.every
+        return True
+
+    def handle_key(self, key):
+        if key in Playback.keys:
+            self.mode = Playback.keys[key]
+        elif key == pygame.K_RIGHTBRACKET:
+            self.speed = min(self.speed * 2, Playback.MAX_SPEED)
+            self.mode = Playback.FAST
+        elif key == pygame.K_LEFTBRACKET:
+            self.speed = max(self.speed // 2, 1)
+            self.mode = Playback.FAST
+        else:
+            return False
+        print(f'Playback: {self}')
+        return True
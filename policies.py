@@ -0,0 +1,51 @@
+import random
+
+from actions import Action
+
+
+# Position-only bot policies. A policy sees the agent positions and a read-only occupancy view - anything with
+# is_free(row, col), like a GameState, a search Board or a codec StateView - so choosing a move never copies a state.
+
+
+def free_actions(position, occupancy):
+    row, col = position
+    return [name for name, (d_row, d_col) in Action.actions.items() if occupancy.is_free(row + d_row, col + d_col)]
+
+
+class Policy:
+    # a deterministic policy always picks the same move in the same position
+    deterministic = True
+
+    def choose(self, agent_id, positions, occupancy):
+        pass
+
+
+class Chase(Policy):
+    # moves to the free neighbour closest (Manhattan distance) to the target agent, ties go by Action order
+    def __init__(self, target_id=0):
+        self.target_id = target_id
+
+    def choose(self, agent_id, positions, occupancy):
+        row, col = positions[agent_id]
+        target_row, target_col = positions[self.target_id]
+        best_action = None
+        best_distance = None
+        for name, (d_row, d_col) in Action.actions.items():
+            if occupancy.is_free(row + d_row, col + d_col):
+                distance = abs(row + d_row - target_row) + abs(col + d_col - target_col)
+                if best_action is None or distance < best_distance:
+                    best_action = name
+                    best_distance = distance
+        return best_action
+
+
+class Wander(Policy):
+    # moves to a uniformly random free neighbour
+    deterministic = False
+
+    def __init__(self, rnd=random):
+        self.rnd = rnd
+
+    def choose(self, agent_id, positions, occupancy):
+        actions = free_actions(positions[agent_id], occupancy)
+        return self.rnd.choice(actions) if actions else None
@@ -0,0 +1,77 @@
+import cProfile
+import io
+import os
+import pstats
+import time
+
+from util import Timeout
+
+# opt-in with --profile[=seconds] or this environment variable set to the slow move threshold in seconds
+ENV = 'PYSTOLOVINA_PROFILE'
+THRESHOLD = 0.5
+
+
+class Profiler:
+    # Profiles every agent move with cProfile in the thread that runs it. Moves slower than the threshold, moves cut
+    # off by the timeout and moves that raised an error are written to their own file, every move adds to the game
+    # summary.
+
+    def __init__(self, folder, threshold=THRESHOLD):
+        self.folder = folder
+        self.threshold = threshold
+        self.stats = None
+        self.moves = 0
+        self.slow = 0
+        os.makedirs(folder, exist_ok=True)
+
+    @staticmethod
+    def from_options(options, folder):
+        value = options.get('profile', os.environ.get(ENV))
+        if value is None:
+            return None
+        return Profiler(folder, THRESHOLD if value is True or value == '' else float(value))
+
+    def wrap(self, method, agent_id, step, position):
+        # method with the same arguments, profiled and tagged with the agent, the step and its position
+        def profiled(*args):
+            profile = cProfile.Profile()
+            start_time = time.time()
+            outcome = 'slow'
+            profile.enable()
+            try:
+                return method(*args)
+            except Timeout:
+                outcome = 'timeout'
+                raise
+            except Exception:
+                outcome = 'error'
+                raise
+            finally:
+                profile.disable()
+                self.add(profile, time.time() - start_time, outcome, agent_id, step, position)
+        return profiled
+
+    def add(self, profile, elapsed, outcome, agent_id, step, position):
+        self.moves += 1
+        if self.stats is None:
+            self.stats = pstats.Stats(profile)
+        else:
+            self.stats.add(profile)
+        if elapsed >= self.threshold or outcome != 'slow':
+            self.slow += 1
+            file_name = f'agent{agent_id}_step{step}_{position[0]}x{position[1]}_{outcome}_{elapsed:.3f}s.prof'
+            profile.dump_stats(os.path.join(self.folder, file_name))
+
+    def summary(self, top=15):
+        # the hottest functions of the game, also written next to the move profiles
+        if self.stats is None:
+            return ''
+        out = io.StringIO()
+        self.stats.stream = out
+        print(f'{self.moves} moves profiled, {self.slow} slower than {self.threshold}s saved to {self.folder}',
+              file=out)
+        self.stats.sort_stats('tottime').print_stats(top)
+        text = out.getvalue()
+        with open(os.path.join(self.folder, 'summary.txt'), 'w') as f:
+            f.write(text)
+        return text
@@ -0,0 +1,153 @@
+import argparse
+import struct
+
+import mapfile
+
+from board import Board, ACTIONS, WIN, LOSS
+
+# replay files: header, agent table (kind, flat index), lineup and then one byte per agent turn
+MAGIC = b'PSTR'
+VERSION = 1
+HEADER = struct.Struct('<4sB20sIIH')
+AGENT = mapfile.AGENT
+LINEUP = struct.Struct('<H')
+DEACTIVATED = 0xFF
+
+
+class ReplayWriter:
+    def __init__(self, path, char_map, agents):
+        # agents - (kind, position, class name) of every agent, in agent id order
+        self.file = open(path, 'wb')
+        cols = len(char_map[0])
+        lineup = ','.join(name for _, _, name in agents).encode()
+        self.file.write(HEADER.pack(MAGIC, VERSION, mapfile.map_hash(char_map), len(char_map), cols, len(agents)))
+        for kind, position, _ in agents:
+            self.file.write(AGENT.pack(kind.encode(), position[0] * cols + position[1]))
+        self.file.write(LINEUP.pack(len(lineup)) + lineup)
+
+    def record(self, action):
+        # None records an agent deactivated for a timeout or an illegal action
+        self.file.write(bytes((DEACTIVATED if action is None else ACTIONS.index(action),)))
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+class Replay:
+    def __init__(self, data):
+        magic, version, self.map_hash, self.rows, self.cols, agents_len = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise Exception(f'ERR: Unsupported replay (version {version})!')
+        offset = HEADER.size
+        self.kinds = []
+        self.positions = []
+        for _ in range(agents_len):
+            kind, index = AGENT.unpack_from(data, offset)
+            self.kinds.append(kind.decode())
+            self.positions.append(divmod(index, self.cols))
+            offset += AGENT.size
+        lineup_len, = LINEUP.unpack_from(data, offset)
+        offset += LINEUP.size
+        self.lineup = bytes(data[offset:offset + lineup_len]).decode().split(',')
+        self.actions = memoryview(data)[offset + lineup_len:]
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as f:
+            return Replay(f.read())
+
+    def board(self, char_map):
+        if mapfile.map_hash(char_map) != self.map_hash:
+            raise Exception('ERR: The replay was not recorded on this map!')
+        return Board(char_map, self.positions)
+
+    def turns(self, board):
+        # Replays the turns on the board in place, following the turn order of Game.run: agents without legal
+        # actions are deactivated before every turn and the game ends as soon as it is decided.
+        # Yields (turn, agent_id, action) for every recorded turn, action is None for a deactivation.
+        turn = 0
+        last_agent_played_id = None
+        actions = self.actions
+        while turn < len(actions):
+            for agent_id in range(len(board.positions)):
+                board.deactivate_stuck()
+                if board.is_over(last_agent_played_id) or turn >= len(actions):
+                    return
+                if not board.active[agent_id]:
+                    continue
+                action = actions[turn]
+                if action == DEACTIVATED:
+                    board.active[agent_id] = False
+                    yield turn, agent_id, None
+                else:
+                    board.move(agent_id, action)
+                    last_agent_played_id = agent_id
+                    yield turn, agent_id, ACTIONS[action]
+                turn += 1
+
+    def board_at(self, char_map, turn):
+        # the position after the first turn recorded turns
+        board = self.board(char_map)
+        if turn > 0:
+            for played, _, _ in self.turns(board):
+                if played + 1 >= turn:
+                    break
+        return board
+
+    def stats(self, char_map):
+        board = self.board(char_map)
+        moves = [0] * len(board.positions)
+        deactivated = [False] * len(board.positions)
+        last_agent_played_id = None
+        for _, agent_id, action in self.turns(board):
+            if action is None:
+                deactivated[agent_id] = True
+            else:
+                moves[agent_id] += 1
+                last_agent_played_id = agent_id
+        board.deactivate_stuck()
+        return {
+            'turns': sum(moves) + sum(deactivated),
+            'outcome': {WIN: 'WIN', LOSS: 'Loss'}.get(board.outcome(last_agent_played_id), 'Game over'),
+            'moves': moves,
+            'deactivated': deactivated
+        }
+
+
+class ReplayActions:
+    # feeds recorded actions to Game.run instead of the agents
+    def __init__(self, replay):
+        self.actions = replay.actions
+        self.turn = 0
+
+    def next_action(self):
+        if self.turn >= len(self.actions):
+            return None
+        action = self.actions[self.turn]
+        self.turn += 1
+        return None if action == DEACTIVATED else ACTIONS[action]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuilds positions and statistics from PyStolovina replays.')
+    parser.add_argument('map', help='map the replays were recorded on')
+    parser.add_argument('replays', nargs='+')
+    parser.add_argument('--turn', type=int, default=None, help='print the position after this many turns')
+    a = parser.parse_args()
+    char_map = mapfile.load(a.map)
+    for path in a.replays:
+        replay = Replay.load(path)
+        if a.turn is not None:
+            b = replay.board_at(char_map, a.turn)
+            rows = [[mapfile.ROAD if b.free[b.index((i, j))] else mapfile.HOLE for j in range(b.cols)]
+                    for i in range(b.rows)]
+            for kind, index, active in zip(replay.kinds, b.positions, b.active):
+                i, j = b.position(index)
+                rows[i][j] = kind if active else 'x'
+            print(f'{path} after {a.turn} turns:')
+            print(mapfile.format_text(rows))
+        else:
+            s = replay.stats(char_map)
+            print(f'{path}: {s["outcome"]} after {s["turns"]} turns, lineup {", ".join(replay.lineup)}, '
+                  f'moves {s["moves"]}, deactivated {s["deactivated"]}')
@@ -0,0 +1,38 @@
+class Scheduler:
+    # Turn order of a game: agents move in id order and only the agents that can still move stay in the rotation.
+    # A move blocks a single cell, so only the mover and the agents next to its new cell can lose their legal
+    # actions; those are the only ones checked before the next turn.
+
+    def __init__(self, positions):
+        self.rotation = list(range(len(positions)))
+        self.cells = {position: agent_id for agent_id, position in enumerate(positions)}
+        self.changed = set(self.rotation)
+
+    def round(self):
+        # the agents to move this round, agents removed during the round are skipped by the game
+        return list(self.rotation)
+
+    def remove(self, agent_id):
+        if agent_id in self.rotation:
+            self.rotation.remove(agent_id)
+        self.changed.discard(agent_id)
+
+    def moved(self, agent_id, old_position, new_position):
+        del self.cells[old_position]
+        self.cells[new_position] = agent_id
+        self.changed.add(agent_id)
+        row, col = new_position
+        for d_row in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                neighbour = self.cells.get((row + d_row, col + d_col))
+                if neighbour is not None:
+                    self.changed.add(neighbour)
+
+    def take_changed(self):
+        # agents to check for legal actions since the last call
+        changed = self.changed
+        self.changed = set()
+        return sorted(changed)
+
+    def can_move(self, agent_id):
+        return agent_id in self.rotation
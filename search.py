@@ -0,0 +1,646 @@
+import argparse
+import math
+import random
+import time
+
+import evaluation
+import tracing
+
+from board import ACTIONS
+
+# node types of the search
+MINIMAX = 'minimax'
+ALPHA_BETA = 'alpha_beta'
+NEGAMAX = 'negamax'
+NEGAMAX_AB = 'negamax_ab'
+EXPECTIMAX = 'expectimax'
+# negamax alpha-beta that searches all but the first move of a node with a zero window (principal variation search)
+PVS = 'pvs'
+# every agent plays the move best for itself, values hold a score for every agent
+MAXN = 'maxn'
+
+# iterative deepening drivers: full window, aspiration windows around the previous score, MTD(f)
+FULL = 'full'
+ASPIRATION = 'aspiration'
+MTDF = 'mtdf'
+
+# score of a won game, wins found closer to the root score higher
+WIN_SCORE = 1000
+# scores beyond this are proven wins or losses, evaluations stay far below it
+PROVEN = WIN_SCORE // 2
+ASPIRATION_WINDOW = 2
+# the deadline is checked once every this many nodes
+CHECK_NODES = 1024
+MAX_TABLE = 1 << 20
+# plies above the depth limit where batching collects the leaves
+BATCH_LEVELS = 2
+
+
+class OutOfTime(Exception):
+    pass
+
+
+class Search:
+    # Iterative game tree search on a Board. Instead of recursing it keeps an explicit stack with one frame per
+    # ply (move list, cursor, undo information, bounds and the best move found) in lists that are allocated once
+    # and reused by every search, and it plays moves on the board in place with make/undo.
+    #
+    # The searching agent (me) plays against all the other agents (paranoid): agents move in id order, the ones
+    # without moves are skipped like Game.check_game_status deactivates them, and the game ends the way
+    # GameState.adjust_win_loss decides it, with me in place of agent 0.
+    #
+    # With memory the negamax node types keep lower and upper bounds of searched positions in a transposition
+    # table (Zobrist hashed), which MTD(f) needs and which orders moves for every other search. An entry is
+    # (depth, lower, upper, best_move, cut), cut - the depth limit cut its tree somewhere, so a table hit on it
+    # tells deepen that a deeper search may still change the result.
+    #
+    # With batch the nodes BATCH_LEVELS plies above the depth limit are not pushed: all the leaves below them are
+    # scored at once by the evaluator's vectorized batch (see evaluation.Frontier).
+    #
+    # order(board, agent_id, moves) sorts the moves of a node in place before they are searched (see
+    # evaluation.ORDERERS). MaxN runs its own loop (see maxn) without pruning, batching or a table.
+    #
+    # table replaces the memory dict with another table (see smp.SharedTable), shuffle (random.shuffle of a seeded
+    # Random) varies the move order and stop() ends the search like the deadline does.
+    #
+    # models[agent_id] is the policy (see policies.py) of an opponent known to follow one, None for the agents
+    # searched as adversaries: only the predicted move of a deterministic policy is searched, the moves of a random
+    # one make a chance node that averages its children over the full window.
+
+    def __init__(self, node_type=ALPHA_BETA, evaluate=None, memory=False, batch=True, table=None, order=None):
+        self.node_type = node_type
+        self.evaluate = evaluate if evaluate is not None else evaluation.Mobility()
+        self.order = order
+        self.batch = batch and evaluation.BATCH and hasattr(self.evaluate, 'batch')
+        self.table = table if table is not None else dict() if memory else None
+        self.shuffle = None
+        self.stop = None
+        self.models = None
+        self.keys = None
+        self.nodes = 0
+        self.batch_nodes = 0
+        self.cut = False
+        self.frames = 0
+        self.moves = []
+        self.cursor = []
+        self.origin = []
+        self.mover = []
+        self.sign = []
+        self.alpha = []
+        self.beta = []
+        self.alpha0 = []
+        self.beta0 = []
+        self.best = []
+        self.best_move = []
+        self.research = []
+        self.chance = []
+        self.hash = []
+        self.deep = []
+
+    def grow(self, frames):
+        extra = frames - self.frames
+        if extra > 0:
+            for frame in (self.moves, self.cursor, self.origin, self.mover, self.sign, self.alpha, self.beta,
+                          self.alpha0, self.beta0, self.best, self.best_move, self.research, self.chance, self.hash,
+                          self.deep):
+                frame.extend([None] * extra)
+            self.frames = frames
+
+    def zobrist(self, board):
+        # a key for every blocked cell, for every agent on every cell and for every agent to move
+        cells = len(board.free)
+        size = cells * (len(board.positions) + 1) + len(board.positions)
+        if self.keys is None or len(self.keys) != size:
+            rnd = random.Random(size)
+            self.keys = [rnd.getrandbits(64) for _ in range(size)]
+        return self.keys, cells
+
+    def model_moves(self, board, agent_id):
+        # (moves, chance) of an agent with a model: the predicted move only, or all the moves of a chance node
+        policy = self.models[agent_id]
+        if policy is None:
+            return board.moves(agent_id), False
+        if not policy.deterministic:
+            return board.moves(agent_id), True
+        positions = [board.position(index) for index in board.positions]
+        return [ACTIONS.index(policy.choose(agent_id, positions, board))], False
+
+    def abort(self, board, ply, nodes):
+        # undoes the moves of the frames up to ply and ends the search
+        for p in range(ply, -1, -1):
+            board.undo(self.mover[p], self.origin[p])
+        self.nodes += nodes
+        raise OutOfTime()
+
+    def run(self, board, me, max_levels, alpha=-math.inf, beta=math.inf, deadline=None):
+        # Returns (score, action) for agent me, action is None when it has no legal moves. max_levels is the number
+        # of plies searched, the move of me included (-1 - unlimited). alpha and beta narrow the root window of
+        # the pruning node types. Raises OutOfTime after the deadline. The board is restored when the search ends.
+        node_type = self.node_type
+        negamax = node_type in (NEGAMAX, NEGAMAX_AB, PVS)
+        prune = node_type in (ALPHA_BETA, NEGAMAX_AB, PVS)
+        pvs = node_type == PVS
+        expect = node_type == EXPECTIMAX
+        evaluate = self.evaluate
+        batch = self.batch
+        agents_len = len(board.positions)
+        # every ply fills a free cell, so the game can not last longer than that
+        limit = max(max_levels, 1) if max_levels >= 0 else sum(board.free) + 1
+        self.grow(min(limit, 64) + 1)
+        if node_type == MAXN:
+            return self.maxn(board, me, limit, deadline)
+
+        moves, cursor, origin, mover, sign = self.moves, self.cursor, self.origin, self.mover, self.sign
+        alpha_, beta_, alpha0, beta0 = self.alpha, self.beta, self.alpha0, self.beta0
+        best, best_move, research, chance, hash_ = self.best, self.best_move, self.research, self.chance, self.hash
+        deep = self.deep
+        shuffle, stop, models, order = self.shuffle, self.stop, self.models, self.order
+        table = self.table if negamax else None
+        if table is not None:
+            # a shared table has a fixed size
+            if isinstance(table, dict) and len(table) > MAX_TABLE:
+                table.clear()
+            keys, cells = self.zobrist(board)
+            hash_[0] = 0
+            for agent_id, index in enumerate(board.positions):
+                hash_[0] ^= keys[(agent_id + 1) * cells + index]
+
+        moves[0] = board.moves(me)
+        if not moves[0]:
+            return -WIN_SCORE, None
+        if shuffle is not None:
+            shuffle(moves[0])
+        if order is not None:
+            order(board, me, moves[0])
+        cursor[0] = 0
+        mover[0] = me
+        sign[0] = 1
+        alpha_[0] = alpha0[0] = alpha
+        beta_[0] = beta0[0] = beta
+        best[0] = -math.inf
+        best_move[0] = None
+        research[0] = False
+        chance[0] = False
+        deep[0] = False
+        if table is not None:
+            entry = table.get(hash_[0] ^ keys[-agents_len + me])
+            if entry is not None and entry[3] in moves[0]:
+                moves[0].remove(entry[3])
+                moves[0].insert(0, entry[3])
+        nodes = 1
+        next_check = CHECK_NODES
+        ply = 0
+        value = None
+        exact = True
+        while True:
+            m = mover[ply]
+            if value is not None:
+                # back from a child, its value is already seen from this frame's side
+                board.undo(m, origin[ply])
+                if pvs and not exact and not research[ply] and not chance[ply] and cursor[ply] > 1 and \
+                        alpha_[ply] < value < beta_[ply]:
+                    # the zero window search failed high, search the move again with the full window
+                    research[ply] = True
+                    cursor[ply] -= 1
+                    value = None
+                else:
+                    research[ply] = False
+                    if chance[ply]:
+                        best[ply] += value
+                    elif sign[ply] > 0 or negamax:
+                        if value > best[ply]:
+                            best[ply] = value
+                            best_move[ply] = moves[ply][cursor[ply] - 1]
+                            if value > alpha_[ply]:
+                                alpha_[ply] = value
+                    elif expect:
+                        best[ply] += value
+                    elif value < best[ply]:
+                        best[ply] = value
+                        best_move[ply] = moves[ply][cursor[ply] - 1]
+                        if value < beta_[ply]:
+                            beta_[ply] = value
+                    value = None
+                    if prune and alpha_[ply] >= beta_[ply]:
+                        cursor[ply] = len(moves[ply])
+
+            if cursor[ply] < len(moves[ply]):
+                action = moves[ply][cursor[ply]]
+                cursor[ply] += 1
+                o = origin[ply] = board.move(m, action)
+                nodes += 1
+                if deadline is not None and nodes >= next_check:
+                    next_check = nodes + CHECK_NODES
+                    if time.time() > deadline or stop is not None and stop():
+                        self.abort(board, ply, nodes)
+                child = ply + 1
+                outcome = board.outcome(m, me)
+                if outcome:
+                    value = outcome * (WIN_SCORE - child)
+                elif child >= limit:
+                    value = evaluate(board, me)
+                    self.cut = deep[ply] = True
+                if value is not None:
+                    if negamax:
+                        value *= sign[ply]
+                    exact = True
+                    continue
+                # the next agent that can move
+                n = m
+                while True:
+                    n = (n + 1) % agents_len
+                    if board.has_moves(n):
+                        break
+                s = 1 if n == me else -1
+                a, b = alpha_[ply], beta_[ply]
+                if pvs and cursor[ply] > 1 and not research[ply] and not chance[ply]:
+                    b = a + 1
+                if negamax and s != sign[ply]:
+                    a, b = -b, -a
+                entry = None
+                if table is not None:
+                    t = board.positions[m]
+                    h = hash_[ply] ^ keys[t] ^ keys[(m + 1) * cells + o] ^ keys[(m + 1) * cells + t]
+                    entry = table.get(h ^ keys[-agents_len + n])
+                    if entry is not None and entry[0] >= limit - child:
+                        if entry[1] >= b:
+                            value = entry[1]
+                        elif entry[2] <= a:
+                            value = entry[2]
+                        else:
+                            a = max(a, entry[1])
+                            b = min(b, entry[2])
+                        if value is not None:
+                            if entry[4]:
+                                self.cut = deep[ply] = True
+                            if s != sign[ply]:
+                                value = -value
+                            exact = False
+                            continue
+                if models is None:
+                    child_moves, child_chance = None, False
+                else:
+                    child_moves, child_chance = self.model_moves(board, n)
+                if batch and child + BATCH_LEVELS >= limit:
+                    value = self.batched(board, n, me, child, limit, expect, child_moves, child_chance)
+                    nodes += self.batch_nodes
+                    deep[ply] = True
+                    if negamax:
+                        value *= sign[ply]
+                    exact = True
+                    continue
+                if child >= self.frames:
+                    self.grow(2 * self.frames)
+                moves[child] = board.moves(n) if child_moves is None else child_moves
+                if shuffle is not None:
+                    shuffle(moves[child])
+                if order is not None and child_moves is None:
+                    order(board, n, moves[child])
+                if entry is not None and entry[3] in moves[child]:
+                    moves[child].remove(entry[3])
+                    moves[child].insert(0, entry[3])
+                if table is not None:
+                    hash_[child] = h
+                cursor[child] = 0
+                mover[child] = n
+                sign[child] = s
+                best_move[child] = None
+                research[child] = False
+                chance[child] = child_chance
+                deep[child] = False
+                if child_chance:
+                    a, b = -math.inf, math.inf
+                alpha_[child] = alpha0[child] = a
+                beta_[child] = beta0[child] = b
+                if child_chance:
+                    best[child] = 0
+                elif negamax or s > 0:
+                    best[child] = -math.inf
+                else:
+                    best[child] = 0 if expect else math.inf
+                ply = child
+                continue
+
+            # all moves done, pass the value to the parent
+            value = best[ply]
+            if chance[ply] or expect and sign[ply] < 0:
+                value /= len(moves[ply])
+            if table is not None:
+                key = hash_[ply] ^ keys[-agents_len + m]
+                depth = limit - ply
+                lower = value if value > alpha0[ply] else -math.inf
+                upper = value if value < beta0[ply] else math.inf
+                entry = table.get(key)
+                if entry is not None and entry[0] == depth:
+                    lower = max(lower, entry[1])
+                    upper = min(upper, entry[2])
+                    deep[ply] = deep[ply] or entry[4]
+                if entry is None or entry[0] <= depth:
+                    table[key] = (depth, lower, upper, best_move[ply], deep[ply])
+            if ply == 0:
+                self.nodes += nodes
+                return value, ACTIONS[best_move[0]]
+            exact = False
+            if deep[ply]:
+                deep[ply - 1] = True
+            if negamax and sign[ply] != sign[ply - 1]:
+                value = -value
+            ply -= 1
+
+    def maxn(self, board, me, limit, deadline):
+        # The MaxN search of run: values are tuples with the score of every agent and the agent to move picks the
+        # child best for itself (the first one of equals). A modeled agent plays its predicted move or averages.
+        evaluate = self.evaluate
+        shuffle, stop, models, order = self.shuffle, self.stop, self.models, self.order
+        agents_len = len(board.positions)
+        moves, cursor, origin, mover = self.moves, self.cursor, self.origin, self.mover
+        best, best_move, chance = self.best, self.best_move, self.chance
+        moves[0] = board.moves(me)
+        if not moves[0]:
+            return -WIN_SCORE, None
+        if shuffle is not None:
+            shuffle(moves[0])
+        if order is not None:
+            order(board, me, moves[0])
+        cursor[0] = 0
+        mover[0] = me
+        best[0] = None
+        best_move[0] = None
+        chance[0] = False
+        nodes = 1
+        next_check = CHECK_NODES
+        ply = 0
+        value = None
+        while True:
+            m = mover[ply]
+            if value is not None:
+                board.undo(m, origin[ply])
+                if chance[ply]:
+                    best[ply] = value if best[ply] is None else tuple(map(sum, zip(best[ply], value)))
+                elif best[ply] is None or value[m] > best[ply][m]:
+                    best[ply] = value
+                    best_move[ply] = moves[ply][cursor[ply] - 1]
+                value = None
+
+            if cursor[ply] < len(moves[ply]):
+                action = moves[ply][cursor[ply]]
+                cursor[ply] += 1
+                origin[ply] = board.move(m, action)
+                nodes += 1
+                if deadline is not None and nodes >= next_check:
+                    next_check = nodes + CHECK_NODES
+                    if time.time() > deadline or stop is not None and stop():
+                        self.abort(board, ply, nodes)
+                child = ply + 1
+                if board.outcome(m, me):
+                    value = tuple(board.outcome(m, agent_id) * (WIN_SCORE - child) for agent_id in range(agents_len))
+                elif child >= limit:
+                    value = tuple(evaluate(board, agent_id) for agent_id in range(agents_len))
+                    self.cut = True
+                if value is not None:
+                    continue
+                n = m
+                while True:
+                    n = (n + 1) % agents_len
+                    if board.has_moves(n):
+                        break
+                if child >= self.frames:
+                    self.grow(2 * self.frames)
+                if models is None:
+                    moves[child], chance[child] = board.moves(n), False
+                else:
+                    moves[child], chance[child] = self.model_moves(board, n)
+                if shuffle is not None:
+                    shuffle(moves[child])
+                if order is not None and len(moves[child]) > 1:
+                    order(board, n, moves[child])
+                cursor[child] = 0
+                mover[child] = n
+                best[child] = None
+                best_move[child] = None
+                ply = child
+                continue
+
+            value = best[ply]
+            if chance[ply]:
+                value = tuple(score / len(moves[ply]) for score in value)
+            if ply == 0:
+                self.nodes += nodes
+                return value[me], ACTIONS[best_move[0]]
+            ply -= 1
+
+    def batched(self, board, n, me, ply, limit, expect, moves=None, chance=False):
+        # The value for me of the node at ply where agent n moves (moves and chance of a modeled agent n). The leaves
+        # below it (at most BATCH_LEVELS plies down) are collected into a Frontier and scored in one batch, then
+        # folded the way the search would.
+        positions = []
+        blocked = []
+        movers = []
+        # per move of n: a proven score or the (first, last) rows of its leaves
+        groups = []
+        free = board.free
+        offsets = board.offsets
+        agents_len = len(board.positions)
+        for action in (moves if moves is not None else board.moves(n)):
+            origin = board.move(n, action)
+            target = board.positions[n]
+            if ply + 1 >= limit:
+                groups.append((len(positions), len(positions) + 1, None, False))
+                positions.append(list(board.positions))
+                blocked.append((target, target))
+                movers.append(n)
+            else:
+                outcome = board.outcome(n, me)
+                if outcome:
+                    groups.append(outcome * (WIN_SCORE - ply - 1))
+                else:
+                    m = n
+                    while True:
+                        m = (m + 1) % agents_len
+                        if board.has_moves(m):
+                            break
+                    first = len(positions)
+                    index = board.positions[m]
+                    m_offsets, m_chance = offsets, False
+                    if self.models is not None and self.models[m] is not None:
+                        m_moves, m_chance = self.model_moves(board, m)
+                        m_offsets = [offsets[k] for k in m_moves]
+                    for offset in m_offsets:
+                        if free[index + offset]:
+                            row = list(board.positions)
+                            row[m] = index + offset
+                            positions.append(row)
+                            blocked.append((target, index + offset))
+                            movers.append(m)
+                    groups.append((first, len(positions), m, m_chance))
+            board.undo(n, origin)
+        self.cut = True
+        self.batch_nodes = len(positions) + (len(groups) if ply + 1 < limit else 0)
+        values = []
+        if positions:
+            leaves = ply + 1 if ply + 1 >= limit else ply + 2
+            values = evaluation.leaf_values(evaluation.Frontier(board, positions, blocked, movers), me,
+                                            self.evaluate, WIN_SCORE - leaves)
+        scores = []
+        for group in groups:
+            if not isinstance(group, tuple):
+                scores.append(group)
+                continue
+            first, last, m, m_chance = group
+            if m is None or m == me:
+                scores.append(max(values[first:last]))
+            elif expect or m_chance:
+                scores.append(sum(values[first:last]) / (last - first))
+            else:
+                scores.append(min(values[first:last]))
+        if n == me:
+            return max(scores)
+        return sum(scores) / len(scores) if expect or chance else min(scores)
+
+    def aspiration(self, board, me, max_levels, guess, deadline=None):
+        # searches a narrow window around the guess first and widens the side that failed
+        if abs(guess) >= PROVEN:
+            return self.run(board, me, max_levels, deadline=deadline)
+        delta = ASPIRATION_WINDOW
+        alpha, beta = guess - delta, guess + delta
+        while True:
+            score, action = self.run(board, me, max_levels, alpha, beta, deadline)
+            if alpha < score < beta or action is None:
+                return score, action
+            delta *= 4
+            if score <= alpha:
+                alpha = guess - delta if delta < PROVEN else -math.inf
+            else:
+                beta = guess + delta if delta < PROVEN else math.inf
+
+    def mtdf(self, board, me, max_levels, guess, deadline=None):
+        # converges on the score with zero window searches, the transposition table keeps their bounds
+        lower, upper = -math.inf, math.inf
+        score = guess
+        best = None
+        while lower < upper:
+            beta = score + 1 if score == lower else score
+            score, action = self.run(board, me, max_levels, beta - 1, beta, deadline)
+            if action is None:
+                return score, None
+            if score >= beta:
+                lower = score
+                best = action
+            else:
+                upper = score
+                if best is None:
+                    best = action
+        return score, best
+
+    def deepen(self, board, me, max_levels, deadline=None, driver=FULL, manager=None, start=1, clear=True):
+        # Iterative deepening up to max_levels plies (-1 - until the game ends or time runs out). A started
+        # timecontrol.TimeManager gives the deadline and decides whether to start each next iteration. start - the
+        # first depth searched, clear - start with an empty transposition table.
+        # Returns (score, action, depth) of the deepest finished iteration.
+        if self.table is not None and clear:
+            self.table.clear()
+        self.nodes = 0
+        if manager is not None:
+            deadline = manager.deadline
+            moves = board.moves(me)
+            if len(moves) == 1:
+                return 0, ACTIONS[moves[0]], 0
+        limit = max(max_levels, 1) if max_levels >= 0 else sum(board.free) + 1
+        score, action, depth = 0, None, 0
+        track = tracing.agent_track(me)
+        for levels in range(min(start, limit), limit + 1):
+            self.cut = False
+            try:
+                # one ply is always searched, so there is a move to play
+                iteration_deadline = deadline if levels > 1 else None
+                with tracing.span('iteration', track, depth=levels):
+                    if driver == MTDF:
+                        result = self.mtdf(board, me, levels, score, iteration_deadline)
+                    elif driver == ASPIRATION and levels > 1:
+                        result = self.aspiration(board, me, levels, score, iteration_deadline)
+                    else:
+                        result = self.run(board, me, levels, deadline=iteration_deadline)
+            except OutOfTime:
+                break
+            (score, action), depth = result, levels
+            # nothing changes deeper once the game tree ended everywhere or the result is proven
+            if action is None or not self.cut or abs(score) >= PROVEN:
+                break
+            if manager is not None and not manager.next_iteration(action):
+                break
+        return score, action, depth
+
+
+def play(board, searches, think_time, max_levels=-1):
+    # plays a headless game in the Game turn order, searches[agent_id] = (Search, driver)
+    # returns (winner, depths reached by every agent)
+    depths = [[] for _ in board.positions]
+    last_agent_played_id = None
+    while True:
+        for agent_id, (search, driver) in enumerate(searches):
+            board.deactivate_stuck()
+            if board.is_over(last_agent_played_id):
+                active = [agent_id for agent_id in range(len(board.positions)) if board.has_moves(agent_id)]
+                return (active[0] if len(active) == 1 else last_agent_played_id), depths
+            if not board.active[agent_id]:
+                continue
+            _, action, depth = search.deepen(board, agent_id, max_levels, time.time() + think_time, driver)
+            depths[agent_id].append(depth)
+            board.move(agent_id, ACTIONS.index(action))
+            last_agent_played_id = agent_id
+
+
+if __name__ == '__main__':
+    # compares search modes at equal time: depth reached on positions of a map and head to head games
+    # against iterative deepening alpha-beta (MinimaxABAgent's search)
+    import mapfile
+
+    from board import Board
+    from states import GameState
+
+    modes = {
+        'alpha_beta': (ALPHA_BETA, FULL, False),
+        'maxn': (MAXN, FULL, False),
+        'pvs': (PVS, ASPIRATION, True),
+        'mtdf': (NEGAMAX_AB, MTDF, True)
+    }
+    parser = argparse.ArgumentParser(description='Benchmarks PyStolovina search modes at equal time.')
+    parser.add_argument('maps', nargs='+')
+    parser.add_argument('--time', type=float, default=0.5, help='seconds per move')
+    parser.add_argument('--positions', type=int, default=5, help='random positions per map')
+    parser.add_argument('--games', type=int, default=2, help='games per mode and map')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--evaluator', choices=evaluation.EVALUATORS.keys(), default='mobility')
+    a = parser.parse_args()
+    evaluator = evaluation.EVALUATORS[a.evaluator]()
+    rnd = random.Random(a.seed)
+    for map_name in a.maps:
+        initial = Board.from_state(GameState.from_char_map(mapfile.load(map_name)))
+        positions = []
+        for _ in range(a.positions):
+            board = initial.copy()
+            for _ in range(rnd.randint(0, 6)):
+                for agent_id in range(len(board.positions)):
+                    if board.has_moves(agent_id):
+                        board.move(agent_id, rnd.choice(board.moves(agent_id)))
+            if board.has_moves(0):
+                positions.append(board)
+        print(f'{map_name}:')
+        for name, (node_type, driver, memory) in modes.items():
+            search = Search(node_type, evaluator, memory)
+            depths = []
+            nodes = 0
+            for board in positions:
+                depths.append(search.deepen(board, 0, -1, time.time() + a.time, driver)[2])
+                nodes += search.nodes
+            wins = 0
+            for game in range(a.games):
+                # alternate the mode between agent 0 and agent 1, everybody else plays alpha-beta as well
+                board = initial.copy()
+                me = game % 2 if len(board.positions) > 1 else 0
+                searches = [(Search(ALPHA_BETA, evaluator), FULL) for _ in board.positions]
+                searches[me] = (Search(node_type, evaluator, memory), driver)
+                winner, _ = play(board, searches, a.time)
+                wins += winner == me
+            print(f'  {name:10} depth {sum(depths) / max(len(depths), 1):5.2f}  '
+                  f'nodes/s {nodes / (a.time * max(len(depths), 1)):9.0f}  won {wins}/{a.games}')
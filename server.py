@@ -0,0 +1,207 @@
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from queue import Queue, Empty
+
+import mapfile
+import symmetry
+
+from states import GameState, AgentState
+from util import TimedFunction, Timeout
+
+# Local analysis service. POST /analyze takes a JSON position and answers with the move the agent picks:
+#   map - position in the maps/ text format, agent characters mark the agents
+#   agents - optional [{"position": [row, col], "kind": "1", "active": true}, ...] in agent id order, when given
+#            agent characters in the map are cells the agents have left (holes)
+#   last_agent_played_id - optional, agent - class from students.py or bots.py (StudentAgent),
+#   agent_id - id of the agent to move (0), time - seconds (1), depth - max_levels (-1)
+
+MAX_TIME = 60
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class Busy(Exception):
+    pass
+
+
+def build_state(request):
+    char_map = mapfile.parse(request['map'])
+    if not char_map or any(len(row) != len(char_map[0]) for row in char_map):
+        raise ValueError('map must be a non-empty rectangle')
+    last_agent_played_id = request.get('last_agent_played_id')
+    if 'agents' not in request:
+        return GameState.from_char_map(char_map, last_agent_played_id)
+    char_map = [[mapfile.HOLE if c != mapfile.ROAD else c for c in row] for row in char_map]
+    agents = []
+    for agent_id, agent in enumerate(request['agents']):
+        row, col = agent['position']
+        kind = str(agent.get('kind', '0' if not agent_id else '1'))
+        char_map[row][col] = kind
+        agents.append(AgentState(agent_id, (row, col), kind, active=agent.get('active', True)))
+    return GameState(char_map, agents, last_agent_played_id)
+
+
+def analyze(request):
+    # runs in a worker process, the same way Game.think runs an agent
+    state = build_state(request)
+    agent_id = request.get('agent_id', 0)
+    name = request.get('agent', 'StudentAgent')
+    class_ = getattr(__import__('students'), name, None) or getattr(__import__('bots'), name)
+    agent = class_(state.agents[agent_id].position(), None)
+    agent.id = agent_id
+    agent.max_think_time = request['time']
+    start_time = time.time()
+    try:
+        tf_queue = Queue(1)
+        tf = TimedFunction(threading.current_thread().ident, tf_queue, request['time'], agent.get_next_action,
+                           state, request['depth'])
+        tf.daemon = True
+        tf.start()
+        while True:
+            try:
+                action, elapsed = tf_queue.get(timeout=0.05)
+                break
+            except Empty:
+                if not tf.is_alive() and tf_queue.empty():
+                    return {'action': None, 'error': 'agent failed', 'elapsed': time.time() - start_time}
+        tf.join()
+    except Timeout:
+        return {'action': None, 'timeout': True, 'elapsed': time.time() - start_time}
+    return {'action': action, 'score': getattr(agent, 'last_score', None), 'elapsed': elapsed}
+
+
+class AnalysisServer:
+    def __init__(self, workers, max_queue, cache_size):
+        self.workers = workers
+        self.pool = ProcessPoolExecutor(workers)
+        # at most workers searches run at once and at most max_queue wait for a worker, the rest is turned away
+        self.slots = asyncio.Semaphore(workers)
+        self.waiting = 0
+        self.max_queue = max_queue
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.in_flight = dict()
+        # symmetry groups by map size
+        self.groups = dict()
+
+    async def analyze(self, request):
+        request['time'] = min(float(request.get('time', 1)), MAX_TIME)
+        if not request['time'] > 0:
+            raise ValueError('time must be positive')
+        request['depth'] = int(request.get('depth', -1))
+        state = build_state(request)
+        # positions equal up to a symmetry share cache entries, actions are stored for the representative. The
+        # terrain is part of the key, so every symmetry of the grid applies, not only those of the current holes.
+        size = len(state.char_map), len(state.char_map[0])
+        if size not in self.groups:
+            self.groups[size] = symmetry.grid_group(*size)
+        key, transform = state.canonical(self.groups[size])
+        cache_key = (key, request.get('agent', 'StudentAgent'), request.get('agent_id', 0),
+                     request['time'], request['depth'])
+        if cache_key in self.cache:
+            self.cache.move_to_end(cache_key)
+            result = dict(self.cache[cache_key], cached=True)
+        elif cache_key in self.in_flight:
+            result = dict(await asyncio.shield(self.in_flight[cache_key]), cached=True)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self.in_flight[cache_key] = future
+            try:
+                result = await self.search(request)
+                if result['action'] is not None:
+                    result['action'] = transform.action(result['action'])
+                    self.cache[cache_key] = result
+                    if len(self.cache) > self.cache_size:
+                        self.cache.popitem(last=False)
+                future.set_result(result)
+            except Exception as e:
+                future.set_exception(e)
+                # marks the exception as retrieved when nobody else waits for it
+                future.exception()
+                raise
+            finally:
+                del self.in_flight[cache_key]
+            result = dict(result, cached=False)
+        if result['action'] is not None:
+            result['action'] = transform.inverse().action(result['action'])
+        return result
+
+    async def search(self, request):
+        if self.waiting >= self.max_queue:
+            raise Busy()
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, analyze, request)
+        finally:
+            self.slots.release()
+
+    async def route(self, method, path, body):
+        if method == 'GET' and path == '/health':
+            return 200, {'workers': self.workers, 'waiting': self.waiting, 'cached': len(self.cache)}
+        if method == 'POST' and path == '/analyze':
+            try:
+                return 200, await self.analyze(json.loads(body))
+            except Busy:
+                return 503, {'error': 'busy, try again later'}
+            except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+                return 400, {'error': f'{type(e).__name__}: {e}'}
+            except Exception as e:
+                return 500, {'error': f'{type(e).__name__}: {e}'}
+        return 404, {'error': f'{method} {path} not found'}
+
+    async def handle(self, reader, writer):
+        try:
+            method, path, _ = (await reader.readline()).decode().split(' ', 2)
+            headers = dict()
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode().partition(':')
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+            status, payload = await self.route(method, path, body)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            status, payload = 400, {'error': f'malformed request: {e}'}
+        data = json.dumps(payload).encode()
+        writer.write(f'HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n'
+                     f'Content-Length: {len(data)}\r\nConnection: close\r\n\r\n'.encode() + data)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(a):
+    server = AnalysisServer(a.workers, a.queue, a.cache)
+    if a.unix:
+        listener = await asyncio.start_unix_server(server.handle, path=a.unix)
+        print(f'Analysis server listening on {a.unix}')
+    else:
+        listener = await asyncio.start_server(server.handle, a.host, a.port)
+        print(f'Analysis server listening on http://{a.host}:{a.port}')
+    async with listener:
+        await listener.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serves PyStolovina position analysis on a local socket.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help='listen on a Unix socket instead of a TCP port')
+    parser.add_argument('--workers', type=int, default=4, help='worker processes running searches')
+    parser.add_argument('--queue', type=int, default=64, help='requests that may wait for a worker')
+    parser.add_argument('--cache', type=int, default=4096, help='cached results')
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,226 @@
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import time
+import weakref
+
+from multiprocessing import shared_memory
+
+import evaluation
+import search
+
+# slots of the shared transposition table, a power of two
+TABLE_SLOTS = 1 << 20
+# a packed entry: depth (15 bits), cut (1 bit), best move (4 bits), lower and upper bound (22 bits each)
+MOVE_BITS = 4
+BOUND_BITS = 22
+CUT = 1 << (2 * BOUND_BITS + MOVE_BITS)
+NO_MOVE = (1 << MOVE_BITS) - 1
+TOP = (1 << BOUND_BITS) - 1
+OFFSET = 1 << (BOUND_BITS - 1)
+MAX_DEPTH = (1 << 15) - 1
+
+
+class SharedTable:
+    # Transposition table in shared memory that the worker processes read and write without locks. Every slot is
+    # two 64 bit words: the key xor-ed with the packed entry, and the packed entry. A slot torn by two workers
+    # writing it at once does not match its key any more and reads as empty. A new entry always replaces the one
+    # in its slot, and bounds are rounded outwards to the integers that fit.
+
+    def __init__(self, slots=TABLE_SLOTS, name=None):
+        if slots & (slots - 1):
+            raise Exception(f'ERR: Table slots {slots} not a power of two!')
+        self.size = slots * 16
+        self.memory = shared_memory.SharedMemory(name=name, create=name is None, size=self.size)
+        self.words = self.memory.buf[:self.size].cast('Q')
+        self.mask = slots - 1
+        self.owner = name is None
+
+    def name(self):
+        return self.memory.name
+
+    def get(self, key):
+        # (depth, lower, upper, best_move, cut) like the entries of Search.table
+        slot = (key & self.mask) << 1
+        data = self.words[slot + 1]
+        if self.words[slot] ^ data != key:
+            return None
+        upper = data & TOP
+        lower = (data >> BOUND_BITS) & TOP
+        move = (data >> (2 * BOUND_BITS)) & NO_MOVE
+        return (data >> (2 * BOUND_BITS + MOVE_BITS + 1),
+                lower - OFFSET if lower else -math.inf,
+                upper - OFFSET if upper != TOP else math.inf,
+                move if move != NO_MOVE else None,
+                bool(data & CUT))
+
+    def __setitem__(self, key, entry):
+        depth, lower, upper, move, cut = entry
+        lower = 0 if lower == -math.inf else max(0, min(math.floor(lower) + OFFSET, TOP - 1))
+        upper = TOP if upper == math.inf else max(1, min(math.ceil(upper) + OFFSET, TOP))
+        data = (min(depth, MAX_DEPTH) << (2 * BOUND_BITS + MOVE_BITS + 1) | (CUT if cut else 0) |
+                (move if move is not None else NO_MOVE) << (2 * BOUND_BITS) | lower << BOUND_BITS | upper)
+        slot = (key & self.mask) << 1
+        self.words[slot] = key ^ data
+        self.words[slot + 1] = data
+
+    def clear(self):
+        self.memory.buf[:self.size] = bytes(self.size)
+
+    def close(self):
+        self.words.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+def work(worker, table_name, slots, node_type, evaluate, order, connection, stop):
+    # a helper process: searches every root it gets until it is told to stop and reports its node count
+    table = SharedTable(slots, table_name)
+    helper = search.Search(node_type, evaluate, table=table, order=order)
+    helper.shuffle = random.Random(worker).shuffle
+    helper.stop = stop.is_set
+    while True:
+        job = connection.recv()
+        if job is None:
+            break
+        board, me, max_levels, deadline, driver = job
+        # half of the helpers run a ply ahead
+        helper.deepen(board, me, max_levels, deadline if deadline is not None else math.inf, driver,
+                      start=1 + worker % 2, clear=False)
+        connection.send(helper.nodes)
+    table.close()
+
+
+def release(table, connections, processes):
+    for connection in connections:
+        connection.send(None)
+    for process in processes:
+        process.join()
+    table.close()
+
+
+class LazySMP:
+    # Lazy SMP: this process and workers - 1 helper processes search the same root, the helpers with shuffled
+    # move orders and half of them a ply deeper, all sharing one transposition table. The helpers search only
+    # to fill the table with bounds and best moves; the result is the one of this process, which stops them
+    # when it is done. Needs a node type with a transposition table (negamax, negamax alpha-beta or PVS).
+
+    def __init__(self, node_type=search.PVS, evaluate=None, workers=None, slots=TABLE_SLOTS, order=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.slots = slots
+        self.table = SharedTable(slots)
+        self.search = search.Search(node_type, evaluate, table=self.table, order=order)
+        self.connections = []
+        self.processes = []
+        self.stop = None
+        self.nodes = 0
+        weakref.finalize(self, release, self.table, self.connections, self.processes)
+
+    def start(self):
+        # fork keeps the helpers from importing the main module again where it can
+        context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+        self.stop = context.Event()
+        if multiprocessing.current_process().daemon:
+            # daemon processes (a server pool) can not start processes of their own
+            print('WARN: Lazy SMP search runs in a single process!')
+            self.workers = 1
+        for worker in range(1, self.workers):
+            connection, child = context.Pipe()
+            process = context.Process(target=work, args=(worker, self.table.name(), self.slots,
+                                                         self.search.node_type, self.search.evaluate,
+                                                         self.search.order, child, self.stop), daemon=True)
+            process.start()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+    def deepen(self, board, me, max_levels, deadline=None, driver=search.ASPIRATION, manager=None):
+        # same as Search.deepen
+        if self.workers > 1 and not self.processes:
+            self.start()
+        self.table.clear()
+        if manager is not None:
+            deadline = manager.deadline
+        if self.stop is not None:
+            self.stop.clear()
+        for connection in self.connections:
+            connection.send((board, me, max_levels, deadline, driver))
+        try:
+            return self.search.deepen(board, me, max_levels, deadline, driver, manager, clear=False)
+        finally:
+            if self.stop is not None:
+                self.stop.set()
+            self.nodes = self.search.nodes + sum(connection.recv() for connection in self.connections)
+
+
+def shallower(positions, workers, max_levels, think_time, evaluate, order=None):
+    # [(position index, single process depth, Lazy SMP depth)] of the positions where Lazy SMP stopped deepening
+    # before a single process with the same depth limit and time did, though its time was not up and its result
+    # not proven (the helpers may prove it sooner)
+    lazy = LazySMP(search.PVS, evaluate, workers, order=order)
+    single = search.Search(search.PVS, evaluate, True, order=order)
+    found = []
+    for k, board in enumerate(positions):
+        depth = single.deepen(board.copy(), 0, max_levels, time.time() + think_time, search.ASPIRATION)[2]
+        deadline = time.time() + think_time
+        score, _, smp_depth = lazy.deepen(board.copy(), 0, max_levels, deadline)
+        if smp_depth < depth and abs(score) < search.PROVEN and time.time() < deadline:
+            found.append((k, depth, smp_depth))
+    return found
+
+
+if __name__ == '__main__':
+    # time to depth of Lazy SMP on positions of a map for every number of workers
+    import mapfile
+
+    from board import Board
+    from states import GameState
+
+    parser = argparse.ArgumentParser(description='Measures the Lazy SMP speedup of PyStolovina searches.')
+    parser.add_argument('maps', nargs='+')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--depth', type=int, default=8, help='plies searched')
+    parser.add_argument('--positions', type=int, default=5, help='random positions per map')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--evaluator', choices=evaluation.EVALUATORS.keys(), default='mobility')
+    parser.add_argument('--check', type=float, default=None, metavar='SECONDS',
+                        help='only checks that Lazy SMP does not stop deepening before one process in the time')
+    a = parser.parse_args()
+    rnd = random.Random(a.seed)
+    positions = []
+    for map_name in a.maps:
+        initial = Board.from_state(GameState.from_char_map(mapfile.load(map_name)))
+        for _ in range(a.positions):
+            board = initial.copy()
+            for _ in range(rnd.randint(0, 6)):
+                for agent_id in range(len(board.positions)):
+                    if board.has_moves(agent_id):
+                        board.move(agent_id, rnd.choice(board.moves(agent_id)))
+            if board.has_moves(0):
+                positions.append(board)
+    print(f'{len(positions)} positions, depth {a.depth}, {os.cpu_count()} cores')
+    if a.check is not None:
+        for workers in a.workers[1:] or a.workers:
+            found = shallower(positions, workers, a.depth, a.check, evaluation.EVALUATORS[a.evaluator]())
+            for k, depth, smp_depth in found:
+                print(f'  position {k}: {depth} levels in one process, {smp_depth} with {workers} workers')
+            if found:
+                raise Exception(f'ERR: Lazy SMP with {workers} workers searched shallower on {len(found)} positions!')
+            print(f'  {workers:2} workers  as deep as one process')
+        raise SystemExit
+    base = None
+    for workers in a.workers:
+        smp = LazySMP(search.PVS, evaluation.EVALUATORS[a.evaluator](), workers)
+        smp.start()
+        elapsed = 0
+        nodes = 0
+        for board in positions:
+            start_time = time.time()
+            smp.deepen(board, 0, a.depth)
+            elapsed += time.time() - start_time
+            nodes += smp.nodes
+        base = base or elapsed
+        print(f'  {workers:2} workers  {elapsed:7.3f}s  speedup {base / elapsed:5.2f}  nodes {nodes}')
+        del smp
@@ -1,26 +1,32 @@
 import pygame
-import os
 import config
 
+from atlas import Atlas
 
-class BaseSprite(pygame.sprite.Sprite):
-    images = dict()
 
+class BaseSprite(pygame.sprite.Sprite):
+    # file_name None makes a headless sprite (no image, no rect), used where nothing is drawn
     def __init__(self, position, file_name, transparent_color=None):
         pygame.sprite.Sprite.__init__(self)
-        if file_name in BaseSprite.images:
-            self.image = BaseSprite.images[file_name]
-        else:
-            self.image = pygame.image.load(os.path.join(config.IMG_FOLDER, file_name)).convert()
-            self.image = pygame.transform.scale(self.image, (config.TILE_SIZE, config.TILE_SIZE))
-            BaseSprite.images[file_name] = self.image
-        # making the image transparent (if needed)
-        if transparent_color:
-            self.image.set_colorkey(transparent_color)
-        self.rect = self.image.get_rect()
+        self.file_name = file_name
+        self.transparent_color = transparent_color
+        self.image = None
+        self.rect = None
         self.row = None
         self.col = None
-        self.place_to(position)
+        self.rescale(position)
+
+    def rescale(self, position=None):
+        if self.file_name is None:
+            self.place_to(position if position else self.position())
+            return
+        # picks the image for the current config.TILE_SIZE
+        self.image = Atlas.get().image(self.file_name)
+        # making the image transparent (if needed)
+        if self.transparent_color:
+            self.image.set_colorkey(self.transparent_color)
+        self.rect = self.image.get_rect()
+        self.place_to(position if position else self.position())
 
     def position(self):
         return self.row, self.col
@@ -28,6 +34,8 @@ class BaseSprite(pygame.sprite.Sprite):
     def place_to(self, position):
         self.row = position[0]
         self.col = position[1]
+        if self.rect is None:
+            return
         self.rect.x = self.col * config.TILE_SIZE
         self.rect.y = self.row * config.TILE_SIZE
 
@@ -1,18 +1,77 @@
-import copy
-
 from actions import Action
-from tiles import Hole
+from mapfile import HOLE, ROAD, find_agents
+
+
+class AgentState:
+    # Headless copy of an agent that lives in game states. It holds only what the game rules need, so states
+    # can be copied cheaply, pickled and sent to other processes.
+    __slots__ = ('id', 'row', 'col', 'active', 'last_action', 'char', 'name')
+
+    def __init__(self, agent_id, position, char, name=None, active=True, last_action=None):
+        self.id = agent_id
+        self.row, self.col = position
+        self.char = char
+        self.name = name
+        self.active = active
+        self.last_action = last_action
+
+    @staticmethod
+    def of(agent):
+        return AgentState(agent.get_id(), agent.position(), agent.map_char(), type(agent).__name__,
+                          agent.is_active(), agent.get_last_action())
+
+    def get_id(self):
+        return self.id
+
+    def kind(self):
+        return self.char
+
+    def is_active(self):
+        return self.active
+
+    def set_active(self, active):
+        self.active = active
+
+    def position(self):
+        return self.row, self.col
+
+    def place_to(self, position):
+        self.row, self.col = position
+
+    def get_last_action(self):
+        return self.last_action
+
+    def apply_action(self, action):
+        self.last_action = action
+        self.place_to(tuple(map(sum, zip(self.position(), Action.actions[action]))))
+
+    @staticmethod
+    def legal_fields():
+        return {ROAD}
+
+    def copy(self):
+        return AgentState(self.id, (self.row, self.col), self.char, self.name, self.active, self.last_action)
 
 
 class GameState:
     initial_state = None
 
-    def __init__(self, char_map, agents:list, last_agent_played_id):
+    def __init__(self, char_map, agents:list, last_agent_played_id, legal_actions=None):
         self.char_map = char_map
         self.agents = agents
         self.last_agent_played_id = last_agent_played_id
         self.win = False
         self.loss = False
+        # legal actions of every agent, computed on first use (None - not computed yet). Entries ignore the active
+        # flag, so activating or deactivating an agent never invalidates them.
+        self.legal_actions = legal_actions if legal_actions is not None else [None] * len(agents)
+
+    @staticmethod
+    def from_char_map(char_map, last_agent_played_id=None):
+        # headless state with the agent ids Game assigns: the student agent first, then the bots row by row
+        agents = sorted(find_agents(char_map), key=lambda agent: (agent[2] != '0', agent[0], agent[1]))
+        return GameState(char_map, [AgentState(agent_id, (row, col), kind)
+                                    for agent_id, (row, col, kind) in enumerate(agents)], last_agent_played_id)
 
     def __str__(self):
         return '\n'.join([''.join(row) for row in self.char_map])
@@ -26,21 +85,35 @@ class GameState:
 
 
 
-    def adjust_win_loss(self):
-        actions_len = [len(self.get_legal_actions(agent_id)) for agent_id in range(len(self.agents))]
-        if not any(actions_len[1:]) and actions_len[0]:
+    def adjust_win_loss(self, movable=None):
+        # movable - ids of the agents that can move, when the caller keeps track of them
+        if movable is None:
+            movable = [agent_id for agent_id in range(len(self.agents)) if self.get_legal_actions(agent_id)]
+        mine = 0 in movable
+        others = len(movable) > mine
+        if not others and mine:
             self.win = True
-        elif not actions_len[0] and any(actions_len[1:]):
+        elif not mine and others:
             self.loss = True
-        elif not any(actions_len):
+        elif not movable:
             self.loss = True if self.last_agent_played_id is not None and self.last_agent_played_id != 0 else False
             self.win = True if self.last_agent_played_id is not None and self.last_agent_played_id == 0 else False
 
     def copy(self):
-        char_map_copy = copy.deepcopy(self.char_map)
+        char_map_copy = [row[:] for row in self.char_map]
         agents_copy = [a.copy() for a in self.agents]
         last_agent_played_id = self.last_agent_played_id
-        return GameState(char_map_copy, agents_copy, last_agent_played_id)
+        return GameState(char_map_copy, agents_copy, last_agent_played_id, list(self.legal_actions))
+
+    def canonical(self, group=None):
+        # (key, transform) of the position under the symmetries of the map (see symmetry.canonical)
+        import symmetry
+        if group is None:
+            template = GameState.initial_state if GameState.initial_state is not None else self
+            if getattr(template, 'symmetries', None) is None:
+                template.symmetries = symmetry.symmetry_group(template.char_map)
+            group = template.symmetries
+        return symmetry.canonical(self, group)
 
     def is_win(self):
         return self.win
@@ -48,6 +121,9 @@ class GameState:
     def is_loss(self):
         return self.loss
 
+    def is_free(self, row, col):
+        return 0 <= row < len(self.char_map) and 0 <= col < len(self.char_map[0]) and self.char_map[row][col] == ROAD
+
     def is_position_legal(self, position, agent):
         row, col = position
         return 0 <= row < len(self.char_map) and \
@@ -55,9 +131,17 @@ class GameState:
             self.char_map[row][col] in agent.legal_fields() or position == agent.position()
 
     def get_legal_actions(self, agent_id):
-        agent = self.agents[agent_id]
-        if not agent.is_active():
+        # the returned list is shared with the cache and must not be modified
+        if not self.agents[agent_id].is_active():
             return []
+        actions = self.legal_actions[agent_id]
+        if actions is None:
+            actions = self.compute_legal_actions(agent_id)
+            self.legal_actions[agent_id] = actions
+        return actions
+
+    def compute_legal_actions(self, agent_id):
+        agent = self.agents[agent_id]
         agent_pos = agent.position()
         actions = []
         for act_name, act_dir in Action.actions.items():
@@ -77,9 +161,16 @@ class GameState:
         if not self.is_position_legal(new_agent_pos, agent):
             raise Exception(f'ERR: {action} is not legal! '
                             f'Agent position: {old_agent_pos}')
-        state.char_map[old_agent_pos[0]][old_agent_pos[1]] = Hole.kind()
+        state.char_map[old_agent_pos[0]][old_agent_pos[1]] = HOLE
         state.char_map[new_agent_pos[0]][new_agent_pos[1]] = agent.kind()
         agent.apply_action(action)
         state.last_agent_played_id = agent_id
+        # only the new cell got blocked (the old one was blocked by the agent and stays blocked by a hole),
+        # so only the mover and the agents next to the new cell can lose legal actions
+        state.legal_actions[agent_id] = None
+        for other_id, other in enumerate(state.agents):
+            row, col = other.position()
+            if abs(row - new_agent_pos[0]) <= 1 and abs(col - new_agent_pos[1]) <= 1:
+                state.legal_actions[other_id] = None
         return state
 
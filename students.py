@@ -1,8 +1,17 @@
+import os
 import random
-import math
 
+import config
+import evaluation
 import game
+import search
+import smp
+import tracing
+
 from agents import Agent
+from board import Board
+from openings import OpeningBook
+from timecontrol import TimeManager
 
 
 # Example agent, behaves randomly.
@@ -31,681 +40,130 @@ class StudentAgent(Agent):
         return chosen_action
 
 
-class MinimaxAgent(StudentAgent):
+class SearchAgent(StudentAgent):
+    # Agents built on the iterative search engine, subclasses pick the node type. With a driver the agent deepens
+    # iteratively until max_levels or until its time manager stops it. Game sets the time of every move:
+    # max_think_time, and in a banked game time_left (the bank, topped up for the move). With opponent_models the
+    # bots that follow a known policy (Aki, Jocke) are searched by their policy instead of as adversaries. evaluator
+    # and orderer are classes from evaluation.py (EVALUATORS and ORDERERS). With openings the agent plays the moves
+    # of the opening cache for its first OPENING_MOVES moves when it has them, only for agents that search like
+    # openings.precompute (PVS with aspiration windows).
+    node_type = search.ALPHA_BETA
+    driver = None
+    memory = False
+    opponent_models = False
+    openings = False
+    evaluator = evaluation.Mobility
+    orderer = None
+    max_think_time = None
+    time_left = None
 
-    def minimax(self, state, max_levels, player, previous_action):
+    def __init__(self, position, file_name):
+        super().__init__(position, file_name)
+        self.search = search.Search(self.node_type, self.evaluator(), self.memory,
+                                    order=self.orderer() if self.orderer is not None else None)
+        self.time_manager = TimeManager()
+        self.last_score = None
+        self.last_depth = None
+        self.moves_played = 0
+        self.book = None
+
+    def opening(self, state, max_levels):
+        # (action, score, depth) from the opening cache, the cache is only read once it has been precomputed. With
+        # a depth limit only entries searched exactly max_levels deep are played.
+        if not self.openings or self.moves_played >= config.OPENING_MOVES or not os.path.exists(config.OPENINGS_FILE):
+            return None
+        if self.book is None:
+            self.book = OpeningBook()
+        if max_levels >= 0:
+            return self.book.get(state, self.id, max_levels, max_levels)
+        return self.book.get(state, self.id)
+
+    def models(self, state):
+        # the policies of the opponents by class name, or by map character in a state without names
+        import bots
+        models = []
+        for agent in state.agents:
+            class_ = getattr(bots, agent.name or bots.BotAgent.agent_names.get(agent.kind(), ''), None)
+            models.append(getattr(class_, 'policy', None) if agent.get_id() != self.id else None)
+        return models if any(models) else None
 
-        id_leg = self.id
-        if self.id != 0:
-            id_leg = 1
-        playerMax = id_leg
-        playerMin = 1 - id_leg
+    def get_next_action(self, state, max_levels):
+        entry = self.opening(state, max_levels)
+        self.moves_played += 1
+        if entry is not None:
+            action, self.last_score, self.last_depth = entry
+            print(f'Agent {self.id} played {action} from the opening cache ({self.last_depth} levels)')
+            return action
+        board = Board.from_state(state)
+        if self.opponent_models:
+            self.search.models = self.models(state)
+        if self.driver is None:
+            with tracing.span('search', tracing.agent_track(self.id), depth=max_levels):
+                self.last_score, action = self.search.run(board, self.id, max_levels)
+            return action
+        # a game can not last longer than the free cells shared by all the agents
+        self.time_manager.start(self.max_think_time, self.time_left, sum(board.free) // len(board.positions))
+        self.last_score, action, self.last_depth = self.search.deepen(board, self.id, max_levels,
+                                                                      driver=self.driver, manager=self.time_manager)
+        print(f'Agent {self.id} searched {self.last_depth} levels in {self.time_manager}')
+        return action
 
 
-        my_actions = self.get_legal_actions(state)
-        opponents_actions = self.get_legal_actions_opponent(state, 1-id_leg)
+class MinimaxAgent(SearchAgent):
+    node_type = search.MINIMAX
 
-        if player == playerMax:
-            if len(my_actions) == 0 or (max_levels == 0 and len(my_actions) <= len(opponents_actions)):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-            elif max_levels == 0 and len(my_actions) >= len(opponents_actions):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-        if player == playerMin:
-            if len(opponents_actions) == 0 or (max_levels == 0 and len(my_actions) >= len(opponents_actions)):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-            elif max_levels == 0 and len(my_actions) <= len(opponents_actions):
-                return (len(my_actions) - len(opponents_actions)), previous_action
 
-        if player == playerMax:
-            actions = my_actions
-        elif player == playerMin:
-            actions = opponents_actions
+class MinimaxABAgent(SearchAgent):
+    node_type = search.ALPHA_BETA
 
-        if player == playerMax:
-            score = -math.inf
-            best_action = None
-            for action in actions:
-                new_state = state.apply_action(player, action)
-                new_score, _ = self.minimax(new_state, max_levels - 1, playerMin,
-                                            action)
-                if new_score > score or best_action is None:
-                    best_action = action
-                    score = new_score
 
-            return score, best_action
+class ModelABAgent(MinimaxABAgent):
+    opponent_models = True
 
-        if player == playerMin:
-            score = +math.inf
-            best_action = None
-            for action in actions:
-                new_state = state.apply_action(player, action)
 
-                new_score, _ = self.minimax(new_state, max_levels - 1, playerMax,
-                                            action)
-                if new_score < score or best_action is None:
-                    best_action = action
-                    score = new_score
+class ExpectAgent(SearchAgent):
+    node_type = search.EXPECTIMAX
 
-            return score, best_action
 
-    def get_next_action(self, state, max_levels):
-        id_leg = self.id
-        if self.id != 0:
-            id_leg = 1
-        actions = state.get_legal_actions(id_leg)
-        isAll = True
-        maxScore = None
-        maxAction = None
-
-        for action in actions:
-            new_state = state.apply_action(id_leg, action)
-            score, _ = self.minimax(new_state, max_levels, 1 - id_leg, None)
-            if maxScore is None or score > maxScore:
-                maxScore = score
-                maxAction = action
-            if score > 0:
-                isAll = False
-
-        if not isAll:
-            return maxAction
-        else:
-            if "NORTH" in actions:
-                return "NORTH"
-            elif "NE" in actions:
-                return "NE"
-            elif "EAST" in actions:
-                return "EAST"
-            elif "SE" in actions:
-                return "SE"
-            elif "SOUTH" in actions:
-                return "SOUTH"
-            elif "SW" in actions:
-                return "SW"
-            elif "WEST" in actions:
-                return "WEST"
-            elif "NW " in actions:
-                return "NW "
-
-
-class MinimaxABAgent(StudentAgent):
-
-    def minimax_alpha_beta(self, state, max_levels, player, previous_action, alpha, beta):
-
-        id_leg = self.id
-        if self.id != 0:
-            id_leg = 1
-        playerMax= id_leg
-        playerMin= 1-id_leg
-
-        my_actions = self.get_legal_actions(state)
-        opponents_actions = self.get_legal_actions_opponent(state, 1-id_leg)
-
-        if player == playerMax:
-            if len(my_actions) == 0 or (max_levels == 0 and len(my_actions) <= len(opponents_actions)):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-            elif max_levels == 0 and len(my_actions) >= len(opponents_actions):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-        if player == playerMin:
-            if len(opponents_actions) == 0 or (max_levels == 0 and len(my_actions) >= len(opponents_actions)):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-            elif max_levels == 0 and len(my_actions) <= len(opponents_actions):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-
-
-        if player == playerMax:
-            actions = my_actions
-        elif player == playerMin:
-            actions = opponents_actions
-
-        if player == playerMax:
-            score = -math.inf
-            best_action = None
-            for action in actions:
-                new_state = state.apply_action(player, action)
-                new_score, _ = self.minimax_alpha_beta(new_state, max_levels - 1, playerMin,
-                                                       action, alpha, beta)
-                if new_score > score or best_action is None:
-                    best_action = action
-                    score = new_score
-
-                alpha = max(alpha, score)
-                if alpha >= beta:
-                    break
-
-            return score, best_action
-
-        if player == playerMin:
-            score = +math.inf
-            best_action = None
-
-            for action in actions:
-
-                new_state = state.apply_action(player, action)
-                new_score, _ = self.minimax_alpha_beta(new_state, max_levels - 1, playerMax,
-                                                       action, alpha, beta)
-                if new_score < score or best_action is None:
-                    best_action = action
-                    score = new_score
-
-                beta = min(beta, score)
-                if alpha >= beta:
-                    break
-
-            return score, best_action
+class MaxNAgent(SearchAgent):
+    # every agent plays the move best for itself by its own evaluation
+    node_type = search.MAXN
 
-    def get_next_action(self, state, max_levels):
-        id_leg = self.id
-        if self.id != 0:
-            id_leg = 1
-        actions = state.get_legal_actions(id_leg)
-        isAll = True
-        maxScore = None
-        maxAction = None
-
-        for action in actions:
-            new_state = state.apply_action(id_leg, action)
-            score, _ = self.minimax_alpha_beta(new_state, max_levels-1, 1-id_leg, None, -math.inf, math.inf)
-            if maxScore is None or score > maxScore:
-                maxScore = score
-                maxAction = action
-            if score > 0:
-                isAll = False
-
-        if not isAll:
-            return maxAction
-        else:
-            if "NORTH" in actions:
-                return "NORTH"
-            elif "NE" in actions:
-                return "NE"
-            elif "EAST" in actions:
-                return "EAST"
-            elif "SE" in actions:
-                return "SE"
-            elif "SOUTH" in actions:
-                return "SOUTH"
-            elif "SW" in actions:
-                return "SW"
-            elif "WEST" in actions:
-                return "WEST"
-            elif "NW " in actions:
-                return "NW "
-
-
-
-class ExpectAgent(StudentAgent):
-
-    def expectimax(self, state, max_levels, player, previous_action):
-
-        id_leg = self.id
-        if self.id != 0:
-            id_leg = 1
-        playerMax = id_leg
-        chance= 1 - id_leg
-
-        my_actions = self.get_legal_actions_opponent(state, id_leg)
-        opponents_actions = self.get_legal_actions_opponent(state, 1-id_leg)
-
-        if player == playerMax:
-            if len(my_actions) == 0 or (max_levels == 0 and len(my_actions) <= len(opponents_actions)):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-            elif max_levels == 0 and len(my_actions) >= len(opponents_actions):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-        if player == chance:
-            if len(opponents_actions) == 0 or (max_levels == 0 and len(my_actions) >= len(opponents_actions)):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-            elif max_levels == 0 and len(my_actions) <= len(opponents_actions):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-
-        if player == playerMax:
-            actions = my_actions
-        elif player == chance:
-            actions = opponents_actions
-
-        if player == playerMax:
-            score = -math.inf
-            best_action = None
-            for action in actions:
-                new_state = state.apply_action(player, action)
-                new_score, _ = self.expectimax(new_state, max_levels - 1, chance,
-                                               action)
-                if new_score > score or best_action is None:
-                    best_action = action
-                    score = new_score
-
-            return score, best_action
-
-        if player == chance:
-            score = 0
-            prob = 1 / len(actions)
-            for action in actions:
-                new_state = state.apply_action(player, action)
-                new_score, _ = self.expectimax(new_state, max_levels - 1, playerMax,
-                                               action)
-                score += new_score * prob
-
-            return score, None
 
-    def get_next_action(self, state, max_levels):
-        id_leg = self.id
-        if self.id != 0:
-            id_leg = 1
-        actions = state.get_legal_actions(id_leg)
-        isAll = True
-        maxScore = None
-        maxAction = None
-
-        for action in actions:
-            new_state = state.apply_action(id_leg, action)
-            score, _ = self.expectimax(new_state, max_levels - 1, 1 - id_leg, None)
-            if maxScore is None or score > maxScore:
-                maxScore = score
-                maxAction = action
-            if score > 0:
-                isAll = False
-
-        if not isAll:
-            return maxAction
-        else:
-            if "NORTH" in actions:
-                return "NORTH"
-            elif "NE" in actions:
-                return "NE"
-            elif "EAST" in actions:
-                return "EAST"
-            elif "SE" in actions:
-                return "SE"
-            elif "SOUTH" in actions:
-                return "SOUTH"
-            elif "SW" in actions:
-                return "SW"
-            elif "WEST" in actions:
-                return "WEST"
-            elif "NW " in actions:
-                return "NW "
-
-
-class MaxNAgent(StudentAgent):
-
-    def maxNAgent(self, state, max_levels, player, previous_action):
-
-        actions = state.get_legal_actions(player)
-
-
-        if len(actions) == 0:
-            state.agents[player].active = False
-        else:
-            only_me_active = True
-            for i in range(0, len(state.agents)):
-                if i == player:
-                    continue
-                if state.agents[i].active:
-                    only_me_active = False
-                    break
-            if only_me_active:
-                return 1000, previous_action
-
-        actions2 = state.get_legal_actions((player + 1) % len(state.agents))
-        actions3 = state.get_legal_actions((player + 2) % len(state.agents))
-
-        if max_levels == 0:
-            if len(actions)>= len(actions2) and len(actions)>=len(actions3):
-                if len(actions2)>=len(actions3):
-                    return (len(actions)-len(actions2)), previous_action
-                else:
-                    return (len(actions) - len(actions3)), previous_action
-            elif len(actions)<= len(actions2) and len(actions)>=len(actions3):
-               return (len(actions2)-len(actions)), previous_action
-            elif len(actions) >= len(actions2) and len(actions) <= len(actions3):
-                return (len(actions3) - len(actions)), previous_action
-            elif len(actions) <= len(actions2) and len(actions) <= len(actions3):
-                if len(actions2)>= len(actions3):
-                    return (len(actions2)-len(actions)), previous_action
-                else:
-                    return (len(actions3) - len(actions)), previous_action
-
-
-        score = -math.inf
-        best_action = None
-
-        for action in actions:
-            new_state = state.apply_action(player, action)
-            for i in range((player + 1) % len(state.agents), len(state.agents)):
-                if state.agents[i].active:
-                    next_player = i
-                    break
-                if i == len(state.agents) - 1:
-                    for i in range(0, player):
-                        if state.agents[i].active:
-                            next_player = i
-                            break
-
-            new_score, _ = self.maxNAgent(new_state, max_levels - 1, next_player, action)
-            if new_score > score or best_action is None:
-                best_action = action
-                score = new_score
-
-        return score, best_action
+class NegamaxAgent(SearchAgent):
+    node_type = search.NEGAMAX
 
-    def get_next_action(self, state, max_levels):
-        # agent_index = state.agents.index(self)
-
-        agent_index = None
-
-        for i in range(0, len(state.agents)):
-            if state.agents[i].id == self.id:
-                agent_index = i
-                break
-        actions = state.get_legal_actions(agent_index)
-        # move, action = self.maxNAgent(state, max_levels, agent_index, None)
-        # return action
-
-        isAll = True
-        maxScore = None
-        maxAction = None
-
-        for action in actions:
-            new_state = state.apply_action(agent_index, action)
-            for i in range((agent_index + 1) % len(state.agents), len(state.agents)):
-                if state.agents[i].active:
-                    next_player = i
-                    break
-                if i == len(state.agents) - 1:
-                    for i in range(0, agent_index):
-                        if state.agents[i].active:
-                            next_player = i
-                            break
-            score, _ = self.maxNAgent(new_state, max_levels - 1, next_player, None)
-
-            if maxScore is None or score > maxScore:
-                maxScore = score
-                maxAction = action
-            if score > 0:
-                isAll = False
-
-        if not isAll:
-            return maxAction
-        else:
-            if "NORTH" in actions:
-                return "NORTH"
-            elif "NE" in actions:
-                return "NE"
-            elif "EAST" in actions:
-                return "EAST"
-            elif "SE" in actions:
-                return "SE"
-            elif "SOUTH" in actions:
-                return "SOUTH"
-            elif "SW" in actions:
-                return "SW"
-            elif "WEST" in actions:
-                return "WEST"
-            elif "NW " in actions:
-                return "NW "
-
-class NegamaxAgent(StudentAgent):
-    def negamax(self, state, max_levels, player, previous_action):
-
-        id_leg = self.id
-        if self.id != 0:
-            id_leg = 1
-        playerMax = id_leg
-        playerMin = 1 - id_leg
-
-
-        my_actions = self.get_legal_actions(state)
-        opponents_actions = self.get_legal_actions_opponent(state, 1-id_leg)
-
-        if player == playerMax:
-            if len(my_actions) == 0 or (max_levels == 0 and len(my_actions) <= len(opponents_actions)):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-            elif max_levels == 0 and len(my_actions) >= len(opponents_actions):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-        if player == playerMin:
-            if len(opponents_actions) == 0 or (max_levels == 0 and len(my_actions) >= len(opponents_actions)):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-            elif max_levels == 0 and len(my_actions) <= len(opponents_actions):  #
-                return (len(my_actions) - len(opponents_actions)), previous_action
-
-        if player == playerMax:
-            actions = my_actions
-        elif player == playerMin:
-            actions = opponents_actions
-
-
-        score = -math.inf
-        best_action = None
-        for action in actions:
-            new_state = state.apply_action(player, action)
-            new_score, _ = self.negamax(new_state, max_levels - 1, (player+1)%1,
-                                        action)
-            new_score = -new_score
-            if new_score > score or best_action is None:
-                best_action = action
-                score = new_score
-            return score, best_action
 
+class NegamaxABAgent(SearchAgent):
+    node_type = search.NEGAMAX_AB
 
 
-    def get_next_action(self, state, max_levels):
-        id_leg = self.id
-        if self.id != 0:
-            id_leg = 1
-        actions = state.get_legal_actions(id_leg)
-        isAll = True
-        maxScore = None
-        maxAction = None
-
-        for action in actions:
-            new_state = state.apply_action(id_leg, action)
-            score, _ = self.negamax(new_state, max_levels, 1 - id_leg, None)
-            score=-score
-            if maxScore is None or score > maxScore:
-                maxScore = score
-                maxAction = action
-            if score > 0:
-                isAll = False
-
-        if not isAll:
-            return maxAction
-        else:
-            if "NORTH" in actions:
-                return "NORTH"
-            elif "NE" in actions:
-                return "NE"
-            elif "EAST" in actions:
-                return "EAST"
-            elif "SE" in actions:
-                return "SE"
-            elif "SOUTH" in actions:
-                return "SOUTH"
-            elif "SW" in actions:
-                return "SW"
-            elif "WEST" in actions:
-                return "WEST"
-            elif "NW " in actions:
-                return "NW "
-
-class NegamaxABAgent(StudentAgent):
-
-    def negamax_alpha_beta(self, state, max_levels, player, previous_action, alpha, beta):
-
-        id_leg = self.id
-        if self.id != 0:
-            id_leg = 1
-        playerMax= id_leg
-        playerMin= 1-id_leg
-
-        my_actions = self.get_legal_actions(state)
-        opponents_actions = self.get_legal_actions_opponent(state, 1-id_leg)
-
-        if player == playerMax:
-            if len(my_actions) == 0 or (max_levels == 0 and len(my_actions) <= len(opponents_actions)):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-            elif max_levels == 0 and len(my_actions) >= len(opponents_actions):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-        if player == playerMin:
-            if len(opponents_actions) == 0 or (max_levels == 0 and len(my_actions) >= len(opponents_actions)):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-            elif max_levels == 0 and len(my_actions) <= len(opponents_actions):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-
-
-        if player == playerMax:
-            actions = my_actions
-        elif player == playerMin:
-            actions = opponents_actions
-
-
-        score = -math.inf
-        best_action = None
-        for action in actions:
-            new_state = state.apply_action(player, action)
-            new_score, _ = self.negamax_alpha_beta(new_state, max_levels - 1, (player+1)%1, action, -beta, -alpha)
-            new_score= - new_score
-            if new_score > score or best_action is None:
-                best_action = action
-                score = new_score
-            alpha = max(alpha, score)
-            if alpha >= beta:
-                break
-
-        return score, best_action
+class NegascoutAgent(SearchAgent):
+    # principal variation search, iterative deepening with aspiration windows
+    node_type = search.PVS
+    driver = search.ASPIRATION
+    memory = True
+    openings = True
 
 
-    def get_next_action(self, state, max_levels):
-        id_leg = self.id
-        if self.id != 0:
-            id_leg = 1
-        actions = state.get_legal_actions(id_leg)
-        isAll = True
-        maxScore = None
-        maxAction = None
-
-        for action in actions:
-            new_state = state.apply_action(id_leg, action)
-            score, _ = self.negamax_alpha_beta(new_state, max_levels-1, 1-id_leg, None, -math.inf, math.inf)
-            score=-score
-            if maxScore is None or score > maxScore:
-                maxScore = score
-                maxAction = action
-            if score > 0:
-                isAll = False
-
-        if not isAll:
-            return maxAction
-        else:
-            if "NORTH" in actions:
-                return "NORTH"
-            elif "NE" in actions:
-                return "NE"
-            elif "EAST" in actions:
-                return "EAST"
-            elif "SE" in actions:
-                return "SE"
-            elif "SOUTH" in actions:
-                return "SOUTH"
-            elif "SW" in actions:
-                return "SW"
-            elif "WEST" in actions:
-                return "WEST"
-            elif "NW " in actions:
-                return "NW "
-
-class NegascoutAgent(StudentAgent):
-
-    def negascout(self, state, max_levels, player, previous_action, alpha, beta):
-
-        id_leg = self.id
-        if self.id != 0:
-            id_leg = 1
-        playerMax= id_leg
-        playerMin= 1-id_leg
-
-        my_actions = self.get_legal_actions(state)
-        opponents_actions = self.get_legal_actions_opponent(state, 1-id_leg)
-
-        if player == playerMax:
-            if len(my_actions) == 0 or (max_levels == 0 and len(my_actions) <= len(opponents_actions)):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-            elif max_levels == 0 and len(my_actions) >= len(opponents_actions):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-        if player == playerMin:
-            if len(opponents_actions) == 0 or (max_levels == 0 and len(my_actions) >= len(opponents_actions)):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-            elif max_levels == 0 and len(my_actions) <= len(opponents_actions):
-                return (len(my_actions) - len(opponents_actions)), previous_action
-
-        if player == playerMax:
-            actions = my_actions
-        elif player == playerMin:
-            actions = opponents_actions
-
-        score = -math.inf
-        best_action = None
-        for action in actions:
-            if action == actions[0]:
-                new_state = state.apply_action(player, action)
-                new_score, _ = self.negascout(new_state, max_levels - 1, (player+1)%1,
-                                                       action, -beta, -alpha)
-                new_score=-new_score
-            else:
-                new_state = state.apply_action(player, action)
-                new_score, _ = self.negascout(new_state, max_levels - 1, (player+1)%1,
-                                                       action, -alpha-1, alpha)
-                new_score = -new_score
-
-                if alpha<new_score<beta:
-                    new_score, _ = self.negascout(new_state, max_levels - 1, playerMin,
-                                                           action, -beta, -alpha)
-                    new_score = -new_score
-
-
-            if new_score > score or best_action is None:
-                best_action = action
-                score = new_score
-
-            alpha = max(alpha, score)
-            if alpha >= beta:
-                break
-
-        return score, best_action
+class ModelNegascoutAgent(NegascoutAgent):
+    # the cache searches the bots as adversaries
+    opponent_models = True
+    openings = False
 
-    def get_next_action(self, state, max_levels):
-        id_leg = self.id
-        if self.id != 0:
-            id_leg = 1
-        actions = state.get_legal_actions(id_leg)
-        isAll = True
-        maxScore = None
-        maxAction = None
-
-        for action in actions:
-            new_state = state.apply_action(id_leg, action)
-            score, _ = self.negascout(new_state, max_levels, 1-id_leg, None, -math.inf, math.inf)
-            score=-score
-            if maxScore is None or score > maxScore:
-                maxScore = score
-                maxAction = action
-            if score > 0:
-                isAll = False
-
-        if not isAll:
-            return maxAction
-        else:
-            if "NORTH" in actions:
-                return "NORTH"
-            elif "NE" in actions:
-                return "NE"
-            elif "EAST" in actions:
-                return "EAST"
-            elif "SE" in actions:
-                return "SE"
-            elif "SOUTH" in actions:
-                return "SOUTH"
-            elif "SW" in actions:
-                return "SW"
-            elif "WEST" in actions:
-                return "WEST"
-            elif "NW " in actions:
-                return "NW "
+
+class MTDFAgent(SearchAgent):
+    node_type = search.NEGAMAX_AB
+    driver = search.MTDF
+    memory = True
+
+
+class LazySMPAgent(NegascoutAgent):
+    # Negascout on every core, the workers share the transposition table (see smp.LazySMP)
+    workers = None
+
+    def __init__(self, position, file_name):
+        super().__init__(position, file_name)
+        self.search = smp.LazySMP(self.node_type, self.evaluator(), self.workers,
+                                  order=self.orderer() if self.orderer is not None else None)
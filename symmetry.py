@@ -0,0 +1,121 @@
+import struct
+
+from operator import itemgetter
+
+from actions import Action
+from mapfile import HOLE
+from states import GameState, AgentState
+
+
+class Transform:
+    # One of the 8 symmetries of a grid: an optional transposition followed by optional row and column flips.
+    # Moves are invariant under all of them, so a transformed position is worth exactly the same.
+
+    def __init__(self, transpose, flip_rows, flip_cols):
+        self.transpose = transpose
+        self.flip_rows = flip_rows
+        self.flip_cols = flip_cols
+        self.permutations = dict()
+
+    def __repr__(self):
+        return f'Transform({self.transpose}, {self.flip_rows}, {self.flip_cols})'
+
+    def __eq__(self, other):
+        return isinstance(other, Transform) and \
+            (self.transpose, self.flip_rows, self.flip_cols) == (other.transpose, other.flip_rows, other.flip_cols)
+
+    def __hash__(self):
+        return hash((self.transpose, self.flip_rows, self.flip_cols))
+
+    def dims(self, rows, cols):
+        return (cols, rows) if self.transpose else (rows, cols)
+
+    def position(self, position, rows, cols):
+        row, col = (position[1], position[0]) if self.transpose else position
+        rows, cols = self.dims(rows, cols)
+        return rows - 1 - row if self.flip_rows else row, cols - 1 - col if self.flip_cols else col
+
+    def vector(self, vector):
+        row, col = (vector[1], vector[0]) if self.transpose else vector
+        return -row if self.flip_rows else row, -col if self.flip_cols else col
+
+    def action(self, action):
+        # the action that makes the same move in the transformed position
+        return ACTION_NAMES[self.vector(Action.actions[action])]
+
+    def inverse(self):
+        for transform in TRANSFORMS:
+            if all(transform.vector(self.vector(v)) == v for v in ((1, 0), (0, 1))):
+                return transform
+
+    def permutation(self, rows, cols):
+        # for every cell of the transformed map, the (row major) index of the cell it comes from
+        if (rows, cols) not in self.permutations:
+            new_rows, new_cols = self.dims(rows, cols)
+            permutation = [0] * (rows * cols)
+            for row in range(rows):
+                for col in range(cols):
+                    new_row, new_col = self.position((row, col), rows, cols)
+                    permutation[new_row * new_cols + new_col] = row * cols + col
+            self.permutations[(rows, cols)] = permutation
+        return self.permutations[(rows, cols)]
+
+    def cells(self, cells, rows, cols):
+        if len(cells) < 2:
+            return cells
+        return ''.join(itemgetter(*self.permutation(rows, cols))(cells))
+
+
+ACTION_NAMES = {vector: name for name, vector in Action.actions.items()}
+TRANSFORMS = [Transform(transpose, flip_rows, flip_cols)
+              for transpose in (False, True) for flip_rows in (False, True) for flip_cols in (False, True)]
+IDENTITY = TRANSFORMS[0]
+AGENT = struct.Struct('<IB')
+
+
+def symmetry_group(char_map):
+    # the symmetries of the map's terrain (holes and everything else), agents stand on roads
+    rows, cols = len(char_map), len(char_map[0])
+    terrain = ''.join('1' if c == HOLE else '0' for row in char_map for c in row)
+    return [transform for transform in TRANSFORMS
+            if (rows == cols or not transform.transpose) and transform.cells(terrain, rows, cols) == terrain]
+
+
+def grid_group(rows, cols):
+    # all the symmetries of a rows x cols grid, a position and its image under any of them are equivalent when
+    # the whole map is compared (the terrain is transformed with the agents)
+    return [transform for transform in TRANSFORMS if rows == cols or not transform.transpose]
+
+
+def transform_state(state, transform):
+    rows, cols = len(state.char_map), len(state.char_map[0])
+    new_rows, new_cols = transform.dims(rows, cols)
+    cells = transform.cells(''.join(''.join(row) for row in state.char_map), rows, cols)
+    agents = []
+    for agent in state.agents:
+        agents.append(AgentState(agent.get_id(), transform.position(agent.position(), rows, cols), agent.kind(),
+                                 getattr(agent, 'name', None), agent.is_active(),
+                                 transform.action(agent.get_last_action()) if agent.get_last_action() else None))
+    return GameState([list(cells[i * new_cols:(i + 1) * new_cols]) for i in range(new_rows)], agents,
+                     state.last_agent_played_id)
+
+
+def canonical(state, group):
+    # Maps a position to the representative of its class under the group. Returns (key, transform): equal keys
+    # mean equivalent positions, and transform maps this position to the representative. An action stored for
+    # the representative is played here as transform.inverse().action(action).
+    rows, cols = len(state.char_map), len(state.char_map[0])
+    cells = ''.join(''.join(row) for row in state.char_map)
+    best_key = None
+    best_transform = None
+    for transform in group:
+        key = transform.cells(cells, rows, cols).encode('latin-1')
+        new_cols = transform.dims(rows, cols)[1]
+        for agent in state.agents:
+            row, col = transform.position(agent.position(), rows, cols)
+            key += AGENT.pack(row * new_cols + col, agent.is_active())
+        if best_key is None or key < best_key:
+            best_key = key
+            best_transform = transform
+    last = state.last_agent_played_id
+    return best_key + struct.pack('<h', -1 if last is None else last), best_transform
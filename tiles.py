@@ -11,7 +11,8 @@ class Tile(BaseSprite):
 
 class Hole(Tile):
     def __init__(self, position):
-        super().__init__(position, f'hole{random.randint(0, 9)}.png')
+        # the same cell always gets the same image, so it does not change when scrolled out of view and back
+        super().__init__(position, f'hole{random.Random(position[0] * 65537 + position[1]).randint(0, 9)}.png')
 
     @staticmethod
     def kind():
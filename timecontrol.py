@@ -0,0 +1,105 @@
+import time
+
+
+class TimeControl:
+    # Time the game gives the agents: a fixed max_think_time per move, or with a bank every agent has a total
+    # for the whole game and gets the increment added before each of its moves. A move may use the whole bank,
+    # an agent that runs out is deactivated like on a timeout.
+
+    def __init__(self, agents_len, max_think_time, bank=None, increment=0):
+        self.max_think_time = max_think_time
+        self.banks = [float(bank)] * agents_len if bank is not None else None
+        self.increment = float(increment) if bank is not None else 0
+
+    @staticmethod
+    def from_options(options, agents_len, max_think_time):
+        bank = options.get('time-bank')
+        return TimeControl(agents_len, max_think_time, float(bank) if bank is not None else None,
+                           float(options.get('increment', 0)))
+
+    def banked(self):
+        return self.banks is not None
+
+    def start_move(self, agent_id):
+        # the time the agent may use for this move
+        if not self.banked():
+            return self.max_think_time
+        self.banks[agent_id] += self.increment
+        return self.banks[agent_id]
+
+    def time_left(self, agent_id):
+        return self.banks[agent_id] if self.banked() else None
+
+    def spend(self, agent_id, elapsed):
+        if self.banked():
+            self.banks[agent_id] = max(self.banks[agent_id] - elapsed, 0)
+
+    def __str__(self):
+        if not self.banked():
+            return f'{self.max_think_time}s per move'
+        return f'{self.banks[0]:.0f}s bank + {self.increment:g}s per move'
+
+
+class TimeManager:
+    # Splits the time of a move for an iteratively deepening agent into a target and a hard deadline. Forced moves
+    # take no time, the target is extended while the best move keeps changing between iterations and the next
+    # iteration is not started when it would not finish before the target.
+    TIME_SHARE = 0.8
+    # share of the bank a single move may use at most
+    MAX_BANK_SHARE = 0.3
+    # share of the hard limit targeted with a fixed time per move, the rest is kept for unstable moves
+    FIXED_TARGET = 0.5
+    MIN_MOVES_LEFT = 5
+    INSTABILITY = 1.5
+    # iteration time growth assumed before two iterations are measured
+    GROWTH = 4
+
+    def __init__(self):
+        self.start_time = 0
+        self.target = None
+        self.deadline = None
+        self.last_action = None
+        self.changes = 0
+        self.iteration_times = []
+        self.iteration_start = 0
+
+    def start(self, max_think_time, time_left=None, moves_left=None):
+        # deadline and target for a move, time_left - the bank in a banked game, the increment of the move included
+        self.start_time = self.iteration_start = time.time()
+        self.last_action = None
+        self.changes = 0
+        self.iteration_times = []
+        if not max_think_time:
+            self.target = self.deadline = None
+            return
+        if time_left is None:
+            hard = max_think_time * self.TIME_SHARE
+            target = hard * self.FIXED_TARGET
+        else:
+            moves_left = max(moves_left or 0, self.MIN_MOVES_LEFT)
+            hard = min(time_left * self.MAX_BANK_SHARE, max_think_time) * self.TIME_SHARE
+            target = min(time_left / moves_left * self.TIME_SHARE, hard)
+        self.deadline = self.start_time + hard
+        self.target = self.start_time + target
+
+    def next_iteration(self, action):
+        # called after every finished iteration with its best action, False - do not start another one
+        now = time.time()
+        self.iteration_times.append(now - self.iteration_start)
+        self.iteration_start = now
+        if self.last_action is not None and action != self.last_action and self.target is not None:
+            # the best move is not settled yet, spend more on it
+            self.changes += 1
+            self.target = min(self.start_time + (self.target - self.start_time) * self.INSTABILITY, self.deadline)
+        self.last_action = action
+        if self.target is None:
+            return True
+        times = self.iteration_times
+        growth = times[-1] / times[-2] if len(times) > 1 and times[-2] > 0 else self.GROWTH
+        return now + times[-1] * max(growth, 1) < self.target
+
+    def __str__(self):
+        if self.target is None:
+            return f'{time.time() - self.start_time:.3f}s'
+        return f'{time.time() - self.start_time:.3f}s of {self.target - self.start_time:.3f}s target, ' \
+               f'{self.deadline - self.start_time:.3f}s max, best move changed {self.changes} times'
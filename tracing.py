@@ -0,0 +1,117 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+# opt-in with --trace[=path] or this environment variable set to the path of the trace file
+ENV = 'PYSTOLOVINA_TRACE'
+RENDER = 'render'
+
+# the tracer of the game, None - tracing is off and every span is a shared no-op
+TRACER = None
+NO_SPAN = contextlib.nullcontext()
+
+
+class Tracer:
+    # Collects spans of the game as Chrome trace events (complete events, viewable in Perfetto or
+    # chrome://tracing), one track (thread id) per agent and one for the render loop of the main thread.
+
+    def __init__(self, path):
+        self.path = path
+        self.start_time = time.perf_counter()
+        self.events = []
+        self.tracks = dict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def from_options(options, folder):
+        value = options.get('trace', os.environ.get(ENV))
+        if value is None:
+            return None
+        if value is True or value == '':
+            value = os.path.join(folder, f'{time.strftime("%Y%m%d-%H%M%S")}.json')
+        return Tracer(value)
+
+    def track(self, name):
+        with self.lock:
+            if name not in self.tracks:
+                self.tracks[name] = len(self.tracks)
+            return self.tracks[name]
+
+    def add(self, name, track, start, end, args=None):
+        event = {'name': name, 'ph': 'X', 'pid': 0, 'tid': self.track(track),
+                 'ts': (start - self.start_time) * 1e6, 'dur': (end - start) * 1e6}
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def save(self):
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': 0, 'tid': tid, 'args': {'name': name}}
+                    for name, tid in self.tracks.items()]
+        metadata += [{'name': 'thread_sort_index', 'ph': 'M', 'pid': 0, 'tid': tid, 'args': {'sort_index': tid}}
+                     for tid in self.tracks.values()]
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump({'traceEvents': metadata + self.events, 'displayTimeUnit': 'ms'}, f)
+        return self.path
+
+
+class Span:
+    def __init__(self, tracer, name, track, args):
+        self.tracer = tracer
+        self.name = name
+        self.track = track
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.add(self.name, self.track, self.start, time.perf_counter(), self.args)
+        return False
+
+
+def agent_track(agent_id):
+    return f'agent {agent_id}'
+
+
+def start(tracer):
+    global TRACER
+    TRACER = tracer
+    if tracer is not None:
+        # the render loop gets the first track
+        tracer.track(RENDER)
+
+
+def span(name, track=RENDER, **args):
+    if TRACER is None:
+        return NO_SPAN
+    return Span(TRACER, name, track, args)
+
+
+def complete(name, track, start_time, **args):
+    # a span that started at start_time (time.perf_counter) and ends now
+    if TRACER is not None:
+        TRACER.add(name, track, start_time, time.perf_counter(), args)
+
+
+def traced(track=RENDER):
+    # decorator, a span of the method's name for every call
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            if TRACER is None:
+                return method(*args, **kwargs)
+            with Span(TRACER, method.__name__, track, None):
+                return method(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def save():
+    if TRACER is not None:
+        return TRACER.save()
@@ -2,6 +2,8 @@ import ctypes
 import time
 from threading import Timer, Thread
 
+import tracing
+
 
 class Timeout(Exception):
     pass
@@ -18,8 +20,12 @@ def send_thread_exception(*args):
 
 
 class TimedFunction(Thread):
+    # trace track of the thread
+    track = 'timed'
+
     def __init__(self, parent_id, queue, max_time_sec, method, *args):
         super().__init__()
+        self.created = time.perf_counter()
         self.parent_id = parent_id
         self.queue = queue
         self.max_time_sec = max_time_sec
@@ -30,12 +36,14 @@ class TimedFunction(Thread):
         return self.ident
 
     def run(self) -> None:
+        tracing.complete('thread startup', self.track, self.created)
         timer = Timer(interval=self.max_time_sec,
                       function=send_thread_exception, args=[self.ident, self.parent_id])
         timer.start()
         try:
             start_time = time.time()
-            result = self.method(*self.args)
+            with tracing.span('think', self.track):
+                result = self.method(*self.args)
             end_time = time.time()
             elapsed_time = end_time - start_time
             self.queue.put((result, elapsed_time), block=False)
@@ -44,3 +52,16 @@ class TimedFunction(Thread):
             pass
         finally:
             timer.cancel()
+
+
+def split_options(argv):
+    # splits command line arguments into positional ones and --name[=value] options
+    args = []
+    options = dict()
+    for arg in argv:
+        if arg.startswith('--'):
+            name, _, value = arg[2:].partition('=')
+            options[name] = value if value else True
+        else:
+            args.append(arg)
+    return args, options
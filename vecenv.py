@@ -0,0 +1,171 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import argparse
+import random
+import time
+
+import mapfile
+import perft
+
+from actions import Action
+from board import ACTIONS
+from policies import Chase, Wander
+from states import GameState
+
+# observation planes: free roads, the student agent, the other active agents
+PLANES = 3
+# action index -> (d_row, d_col), in ACTIONS order
+DIRECTIONS = list(Action.actions.values())
+
+
+class VecEnv:
+    # N games played in lockstep for batch self-play: the caller plays the student agent (id 0) of every game and
+    # the bots answer with their policies, by the game rules of GameState in the turn order of Game.run. Game k
+    # is played on map k % len(maps) and starts again as soon as it ends, so every step returns the first
+    # position of the new game for the games that ended. policies maps bot class names to policies (see
+    # policies.py), by default Aki chases and Jocke wanders. A bot without a policy, like the searching Draza and
+    # Bole, is an error unless wander is set: then it wanders and the opponents differ from the ones of Game.
+    #
+    # Observations are stacked over the games and padded to the largest map (padding is blocked):
+    # planes (N, PLANES, rows, cols) uint8, positions (N, agents, 2) with -1 for missing agents, active
+    # (N, agents) and the legal move mask (N, 8) of the student agent in ACTIONS order. An illegal action
+    # deactivates the student agent like a timeout does in the game.
+
+    def __init__(self, map_names, envs, policies=None, seed=None, wander=False):
+        if numpy is None:
+            raise Exception('ERR: VecEnv needs numpy!')
+        self.envs = envs
+        self.rnd = random.Random(seed)
+        # bot class name -> policy, Aki chases the student agent and Jocke wanders
+        self.policies = policies if policies is not None else {'Aki': Chase(0), 'Jocke': Wander(self.rnd)}
+        self.maps = []
+        for map_name in map_names:
+            char_map, legend = mapfile.read(map_name)
+            state = GameState.from_char_map(char_map)
+            # the map character names the bots that are neither in the legend nor built in
+            names = [legend.get(agent.kind()) or mapfile.BOT_NAMES.get(agent.kind(), agent.kind())
+                     for agent in state.agents[1:]]
+            for name in sorted(set(names) - set(self.policies)):
+                if not wander:
+                    raise Exception(f'ERR: {name} has no policy in {map_name}, pass it in policies or set wander!')
+                print(f'WARN: {name} has no policy, it wanders in {map_name}!')
+            roads = numpy.array([[c == mapfile.ROAD for c in row] for row in char_map], dtype=numpy.uint8)
+            self.maps.append((state, [None] + [self.policies.get(name, Wander(self.rnd)) for name in names], roads))
+        self.rows = max(len(state.char_map) for state, _, _ in self.maps)
+        self.cols = max(len(state.char_map[0]) for state, _, _ in self.maps)
+        self.agents_len = max(len(state.agents) for state, _, _ in self.maps)
+        # free cells with a blocked border, so the neighbours of every cell are inside
+        self.free = numpy.zeros((envs, self.rows + 2, self.cols + 2), dtype=numpy.uint8)
+        self.positions = numpy.full((envs, self.agents_len, 2), -1, dtype=numpy.int64)
+        self.active = numpy.zeros((envs, self.agents_len), dtype=bool)
+        self.states = [None] * envs
+        self.over = [False] * envs
+        self.directions = numpy.array(DIRECTIONS, dtype=numpy.int64)
+
+    def reset(self):
+        for env in range(self.envs):
+            self.reset_game(env)
+        return self.observe()
+
+    def reset_game(self, env):
+        initial, _, roads = self.maps[env % len(self.maps)]
+        state = initial.copy()
+        rows, cols = roads.shape
+        self.free[env] = 0
+        self.free[env, 1:rows + 1, 1:cols + 1] = roads
+        self.positions[env] = -1
+        self.active[env] = False
+        self.states[env] = state
+        self.over[env] = perft.is_over(state)
+        self.sync(env)
+
+    def sync(self, env):
+        for agent in self.states[env].agents:
+            self.positions[env, agent.get_id()] = agent.position()
+            self.active[env, agent.get_id()] = agent.is_active()
+
+    def move(self, env, agent_id, action):
+        # plays a legal action, the agent leaves a hole behind and blocks its new cell
+        state = self.states[env] = self.states[env].apply_action(agent_id, action)
+        row, col = state.agents[agent_id].position()
+        self.free[env, row + 1, col + 1] = 0
+
+    def play(self, env, action):
+        # the student agent's move and the bots' answers, True when the game ended
+        state = self.states[env]
+        if action in state.get_legal_actions(0):
+            self.move(env, 0, action)
+        else:
+            state.agents[0].set_active(False)
+        agent_id = 1 % len(state.agents)
+        while True:
+            state = self.states[env]
+            if perft.is_over(state):
+                return True
+            if agent_id == 0:
+                return False
+            if state.agents[agent_id].is_active():
+                policy = self.maps[env % len(self.maps)][1][agent_id]
+                bot_action = policy.choose(agent_id, [agent.position() for agent in state.agents], state)
+                if bot_action is None or bot_action not in state.get_legal_actions(agent_id):
+                    state.agents[agent_id].set_active(False)
+                else:
+                    self.move(env, agent_id, bot_action)
+            agent_id = (agent_id + 1) % len(state.agents)
+
+    def step(self, actions):
+        # actions - (N,) indices into ACTIONS, returns (planes, positions, active, mask, rewards, dones)
+        rewards = numpy.zeros(self.envs, dtype=numpy.float32)
+        dones = numpy.zeros(self.envs, dtype=bool)
+        for env in range(self.envs):
+            done = self.over[env] or self.play(env, ACTIONS[actions[env]])
+            if done:
+                state = self.states[env]
+                rewards[env] = 1 if state.is_win() else -1 if state.is_loss() else 0
+                dones[env] = True
+                self.reset_game(env)
+            else:
+                self.sync(env)
+        return self.observe() + (rewards, dones)
+
+    def observe(self):
+        # (planes, positions, active, mask) of all the games
+        envs = numpy.arange(self.envs)
+        planes = numpy.zeros((self.envs, PLANES, self.rows, self.cols), dtype=numpy.uint8)
+        planes[:, 0] = self.free[:, 1:-1, 1:-1]
+        games, agents = numpy.nonzero(self.active)
+        rows, cols = self.positions[games, agents, 0], self.positions[games, agents, 1]
+        planes[games, numpy.where(agents == 0, 1, 2), rows, cols] = 1
+        me = self.positions[:, 0]
+        mask = self.free[envs[:, None], me[:, None, 0] + 1 + self.directions[:, 0],
+                         me[:, None, 1] + 1 + self.directions[:, 1]].astype(bool)
+        mask &= self.active[:, 0, None]
+        return planes, self.positions.copy(), self.active.copy(), mask
+
+
+if __name__ == '__main__':
+    # steps per second of random legal play
+    parser = argparse.ArgumentParser(description='Plays random PyStolovina games in a vectorized environment.')
+    parser.add_argument('maps', nargs='+')
+    parser.add_argument('--envs', type=int, default=64)
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=1)
+    a = parser.parse_args()
+    # the throughput of the environment, the bots without a policy wander
+    env = VecEnv(a.maps, a.envs, seed=a.seed, wander=True)
+    rnd = numpy.random.default_rng(a.seed)
+    _, _, _, mask = env.reset()
+    games = 0
+    score = 0
+    start_time = time.time()
+    for _ in range(a.steps):
+        # a random legal action, or any action when there is none
+        choice = numpy.where(mask, rnd.random(mask.shape), -1).argmax(axis=1)
+        _, _, _, mask, rewards, dones = env.step(choice)
+        games += int(dones.sum())
+        score += float(rewards.sum())
+    elapsed = time.time() - start_time
+    print(f'{a.envs * a.steps / elapsed:.0f} steps/s, {games} games, average reward {score / max(games, 1):+.3f}')